@@ -3,9 +3,11 @@ import logging
 from flask import Flask, jsonify
 from werkzeug.middleware.proxy_fix import ProxyFix
 from .config import config
+from .jsonlib import FastJSONProvider
 
 def create_app(config_name):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
 
@@ -15,6 +17,13 @@ def create_app(config_name):
     if not os.path.exists(app.config['CACHE_DIR']):
         os.makedirs(app.config['CACHE_DIR'])
 
+    from . import admission, background, services, utils
+    services.init_sleeper_client(app.config)
+    utils.init_freshness_policy(app.config)
+    utils.init_cache_budgets(app.config)
+    background.init_app(app.config)
+    admission.init_app(app.config)
+
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1)
 
     # Registrar Blueprints
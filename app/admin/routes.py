@@ -1,6 +1,6 @@
 import os
-import json
 from flask import Blueprint, jsonify, request, session, render_template, current_app
+from app import background
 from app.utils import admin_login_required
 from collections import Counter
 from datetime import datetime
@@ -100,14 +100,10 @@ def admin_login():
 def get_access_log():
     access_log_file = current_app.config['ACCESS_LOG_FILE']
     try:
-        if os.path.exists(access_log_file):
-            with open(access_log_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-            processed_data = process_access_logs(logs)
-            return jsonify(processed_data)
-
-        # Retorna uma estrutura vazia se o arquivo de log não existir
-        return jsonify(process_access_logs([]))
+        # A leitura e agregação do log correm no processo de manutenção
+        # (sem o ficheiro, retorna uma estrutura vazia)
+        processed_data = background.submit('access_log', background.aggregate_access_log, access_log_file).result()
+        return jsonify(processed_data)
     except Exception as e:
         current_app.logger.error(f"Erro ao ler e processar log de acessos: {str(e)}")
         return jsonify(error='Erro ao carregar dados'), 500
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from flask import Response, current_app, jsonify, request, session
+from .config import Config
+
+
+class Rejected(Exception):
+    def __init__(self, status_code, retry_after, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.message = message
+
+
+class _Flight:
+    """Pedido em curso partilhado por pedidos idênticos do mesmo usuário."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class AdmissionController:
+    """
+    Controlo de admissão dos endpoints com fan-out para o Sleeper: orçamento global de
+    pedidos simultâneos, fila de espera limitada e limite de pedidos em curso por usuário.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout, per_user, retry_after):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_user = per_user
+        self.retry_after = retry_after
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._user_active = Counter()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self.stats = Counter()
+
+    def configure(self, max_concurrent, max_queue, queue_timeout, per_user, retry_after):
+        with self._cond:
+            self.max_concurrent = max_concurrent
+            self.max_queue = max_queue
+            self.queue_timeout = queue_timeout
+            self.per_user = per_user
+            self.retry_after = retry_after
+            self._cond.notify_all()
+
+    def _check_user(self, user_id):
+        if self._user_active[user_id] >= self.per_user:
+            self.stats['rejected_user'] += 1
+            raise Rejected(429, self.retry_after, 'Too many requests in progress for this user')
+
+    def acquire(self, user_id):
+        with self._cond:
+            self._check_user(user_id)
+            if self._active >= self.max_concurrent and self._waiting >= self.max_queue:
+                self.stats['rejected_overload'] += 1
+                raise Rejected(503, self.retry_after, 'Server busy, please try again shortly')
+
+            # Reserva a vaga do usuário já durante a espera, para não enfileirar vários pedidos seus
+            self._user_active[user_id] += 1
+            deadline = time.monotonic() + self.queue_timeout
+            self._waiting += 1
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._release_user(user_id)
+                        self.stats['rejected_timeout'] += 1
+                        raise Rejected(503, self.retry_after, 'Server busy, please try again shortly')
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self.stats['admitted'] += 1
+
+    def _release_user(self, user_id):
+        self._user_active[user_id] -= 1
+        if self._user_active[user_id] <= 0:
+            del self._user_active[user_id]
+
+    def release(self, user_id):
+        with self._cond:
+            self._active -= 1
+            self._release_user(user_id)
+            self._cond.notify()
+
+    def add_follower(self, user_id):
+        """
+        Quem espera por um pedido idêntico também ocupa uma thread: conta no limite do
+        usuário e nas vagas da fila, como um pedido em espera.
+        """
+        with self._cond:
+            self._check_user(user_id)
+            if self._waiting >= self.max_queue:
+                self.stats['rejected_overload'] += 1
+                raise Rejected(503, self.retry_after, 'Server busy, please try again shortly')
+            self._user_active[user_id] += 1
+            self._waiting += 1
+
+    def remove_follower(self, user_id):
+        with self._cond:
+            self._waiting -= 1
+            self._release_user(user_id)
+
+    def join_flight(self, key):
+        """Retorna (flight, é_líder). O líder executa; os restantes esperam pelo seu resultado."""
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def finish_flight(self, key, flight, result):
+        with self._flights_lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.done.set()
+
+    def snapshot(self):
+        with self._cond:
+            return {'active': self._active, 'waiting': self._waiting, **self.stats}
+
+
+ADMISSION = AdmissionController(
+    Config.ADMISSION_MAX_CONCURRENT, Config.ADMISSION_MAX_QUEUE, Config.ADMISSION_QUEUE_TIMEOUT,
+    Config.ADMISSION_PER_USER, Config.ADMISSION_RETRY_AFTER
+)
+
+
+def init_app(config):
+    ADMISSION.configure(
+        config['ADMISSION_MAX_CONCURRENT'], config['ADMISSION_MAX_QUEUE'], config['ADMISSION_QUEUE_TIMEOUT'],
+        config['ADMISSION_PER_USER'], config['ADMISSION_RETRY_AFTER']
+    )
+
+
+def _rejected_response(rejected):
+    response = jsonify(error=rejected.message)
+    response.status_code = rejected.status_code
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+
+def admission_required(f):
+    """
+    Decorator para endpoints caros (fan-out para o Sleeper). Pedidos idênticos do mesmo
+    usuário em curso partilham a resposta; os restantes passam pelo controlo de admissão.
+    Quem espera pela resposta partilhada conta no limite por usuário e espera no máximo
+    o mesmo que a fila. Deve ficar abaixo de login_required.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session.get('user_id')
+        key = (user_id, request.endpoint, request.query_string)
+
+        flight, leader = ADMISSION.join_flight(key)
+        if not leader:
+            try:
+                ADMISSION.add_follower(user_id)
+            except Rejected as rejected:
+                return _rejected_response(rejected)
+            try:
+                finished = flight.done.wait(ADMISSION.queue_timeout)
+            finally:
+                ADMISSION.remove_follower(user_id)
+            if flight.result is not None:
+                ADMISSION.stats['coalesced'] += 1
+                body, status, headers = flight.result
+                return Response(body, status=status, headers=headers)
+            if not finished:
+                ADMISSION.stats['rejected_timeout'] += 1
+                return _rejected_response(Rejected(503, ADMISSION.retry_after, 'Server busy, please try again shortly'))
+            # O líder terminou sem resposta partilhável (erro, rejeição ou streaming): segue o caminho normal
+
+        try:
+            ADMISSION.acquire(user_id)
+        except Rejected as rejected:
+            if leader:
+                ADMISSION.finish_flight(key, flight, None)
+            return _rejected_response(rejected)
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            ADMISSION.release(user_id)
+            if leader:
+                ADMISSION.finish_flight(key, flight, None)
+            raise
+
+        if response.is_streamed:
+            # O trabalho acontece durante o envio: a vaga só é libertada no fim da resposta
+            response.call_on_close(lambda: ADMISSION.release(user_id))
+            if leader:
+                ADMISSION.finish_flight(key, flight, None)
+        else:
+            ADMISSION.release(user_id)
+            if leader:
+                # O cookie de sessão é gerado por pedido; não é partilhado
+                headers = [(name, value) for name, value in response.headers if name.lower() != 'set-cookie']
+                ADMISSION.finish_flight(key, flight, (response.get_data(), response.status_code, headers))
+        return response
+    return decorated_function
@@ -1,12 +1,13 @@
 import os
-from datetime import datetime
-from flask import Blueprint, jsonify, session, request, current_app
-from app import services, utils
+from datetime import datetime, timezone
+from flask import Blueprint, Response, jsonify, session, request, current_app, stream_with_context, redirect, url_for
+from app import admission, jsonlib, services, utils
 
 api = Blueprint('api', __name__)
 
 @api.route('/player-status')
 @utils.login_required
+@admission.admission_required
 def player_status():
     user_id = session['user_id']
     show_best_ball = request.args.get('showBestBall', 'false').lower() == 'true'
@@ -15,6 +16,7 @@ def player_status():
 
 @api.route('/refresh-league-status')
 @utils.login_required
+@admission.admission_required
 def refresh_league_status():
     user_id = session['user_id']
     show_best_ball = request.args.get('showBestBall', 'false').lower() == 'true'
@@ -27,107 +29,82 @@ def cache_info():
     players_cache_file = current_app.config['PLAYERS_CACHE_FILE']
     if os.path.exists(players_cache_file):
         mod_time = os.path.getmtime(players_cache_file)
-        ttl = utils.get_cache_ttl()
+        ttl = utils.get_cache_ttl('players', at=mod_time)
         return jsonify({
-            'last_updated': datetime.fromtimestamp(mod_time).isoformat(),
-            'expires_at': datetime.fromtimestamp(mod_time + ttl).isoformat(),
+            'last_updated': datetime.fromtimestamp(mod_time, timezone.utc).isoformat(),
+            'expires_at': datetime.fromtimestamp(mod_time + ttl, timezone.utc).isoformat(),
             'ttl_seconds': ttl,
             'cache_size': os.path.getsize(players_cache_file),
-            'is_night': utils.is_night_time(),
-            'is_morning': utils.is_morning_time()
+            'freshness_phase': utils.get_freshness_phase(),
+            'sleeper_circuits': services.SLEEPER_BREAKERS.snapshot(),
+            'admission': admission.ADMISSION.snapshot(),
+            'memory_caches': utils.get_cache_stats()
         })
-    return jsonify(status='no_cache')
+    return jsonify(status='no_cache', memory_caches=utils.get_cache_stats())
     
 @api.route('/top-players')
 @utils.login_required
+@admission.admission_required
 def top_players():
     user_id = session['user_id']
-    leagues = services.get_cached_leagues(user_id) or []
-    all_players_data = services.get_all_players() or {}
-    player_map = {}
+    return jsonify(services.get_top_players(user_id))
 
-    for league in leagues:
-        if not league or 'league_id' not in league: continue
-        league_id = league['league_id']
-        rosters = services.get_cached_rosters(league_id) or []
-        user_rosters = [r for r in rosters if r and r.get('owner_id') == user_id]
+@api.route('/dashboard')
+@utils.login_required
+@admission.admission_required
+def dashboard_bundle():
+    """Ligas, status dos titulares e top players calculados a partir de uma única busca."""
+    user_id = session['user_id']
+    show_best_ball = request.args.get('showBestBall', 'false').lower() == 'true'
+    force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+    sections = services.iter_dashboard_sections(user_id, show_best_ball=show_best_ball, force_refresh=force_refresh)
 
-        for roster in user_rosters:
-            for player_id in roster.get('players') or []:
-                if not player_id: continue
-                player_data = all_players_data.get(player_id, {})
-                
-                if player_id not in player_map:
-                    player_map[player_id] = {
-                        'name': player_data.get('full_name') or f'Player_{player_id[:6]}',
-                        'count': 0, 'leagues': [],
-                        'position': player_data.get('position', '?'),
-                        'injury_status': utils.format_status(player_data.get('injury_status') or 'Active')
-                    }
-                
-                player_map[player_id]['count'] += 1
-                roster_position = services.get_roster_position(player_id, roster, league_id)
-                player_map[player_id]['leagues'].append({
-                    'league_name': league.get('name', 'Unknown'), 'league_id': league_id,
-                    'roster_id': roster.get('roster_id'), 'roster_position': roster_position
-                })
-    
-    players_list = sorted(list(player_map.values()), key=lambda x: (-x['count'], x['name']))
-    return jsonify(players_list[:current_app.config['TOPN']])
+    if request.args.get('stream', 'false').lower() == 'true':
+        # Uma linha JSON (NDJSON) por secção, enviada assim que fica pronta
+        def generate():
+            for name, data in sections:
+                yield jsonlib.dumps({'section': name, 'data': data}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    return jsonify(dict(sections))
 
 @api.route('/search-players')
 @utils.login_required
 def search_players():
-    query = request.args.get('query', '').strip().lower()[:50]
+    query = request.args.get('query', '').strip()[:50]
     positions = request.args.getlist('positions')
     if not positions: return jsonify([])
+    limit = min(request.args.get('limit', 20, type=int), current_app.config['MAX_SEARCH_RESULTS'])
 
-    all_players = services.get_all_players()
-    results = []
-    
-       
-    for player_id, player in all_players.items():
-        # Debug: verificar a estrutura de cada jogador
-        full_name = player.get('full_name')
-        if not full_name:
-            first_name = player.get('first_name', '')
-            last_name = player.get('last_name', '')
-            full_name = f"{first_name} {last_name}".strip()
-        
-        # Se ainda não tiver nome, pular este jogador
-        if not full_name:
-            current_app.logger.debug(f"Player {player_id} has no name data: {player}")
-            continue
-            
-        # Verificar se a query corresponde ao nome
-        if query and query not in full_name.lower(): 
-            continue
-        
-        player_positions = player.get('fantasy_positions') or []
-        if not any(pos in positions for pos in player_positions): 
-            continue
-        
-        results.append({
-            'id': player_id, 
-            'name': full_name,
-            'positions': player_positions,
-            'status': player.get('status', 'Active'),
-            'status_abbr': current_app.config['STATUS_CONFIG'].get(player.get('status'), {}).get('abbr', ''),
-            'depth_chart_order': player.get('depth_chart_order')
-        })
-
+    results = services.search_players(query, positions, limit=max(limit, 1))
     current_app.logger.debug(f"Found {len(results)} results")
-    
-    # Ordenar primeiro por depth_chart_order (None vai para o final) e depois por nome
-    results.sort(key=lambda x: (
-        x['depth_chart_order'] if x['depth_chart_order'] is not None else float('inf'),
-        x['name']
-    ))
-    
     return jsonify(results)
 
+@api.route('/player-index')
+@utils.login_required
+def player_index():
+    """Versão atual do índice de jogadores; o conteúdo é servido na URL versionada (cache imutável)."""
+    version, _ = services.get_player_index()
+    response = jsonify(version=version, url=url_for('api.player_index_asset', version=version))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/player-index/<version>.json')
+@utils.login_required
+def player_index_asset(version):
+    current_version, body = services.get_player_index()
+    if version != current_version:
+        return redirect(url_for('api.player_index_asset', version=current_version))
+
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = f"private, max-age={current_app.config['PLAYER_INDEX_MAX_AGE']}, immutable"
+    response.set_etag(current_version)
+    # Revalidação com If-None-Match recebe 304 em vez do índice completo
+    return response.make_conditional(request)
+
 @api.route('/player-details')
 @utils.login_required
+@admission.admission_required
 def player_details():
 
     
@@ -169,62 +146,22 @@ def player_details():
 
         league_id = league.get('league_id')
         league_name = league.get('name', 'Unknown')
-        rosters = services.get_cached_rosters(league_id) or []
-        
-        player_found_in_roster = False
-        
-        for roster in rosters:
-            if not roster:
-                continue
-            
-            # Verifica se o jogador está em algum roster (seu ou de outra pessoa)
-            if player_id in (roster.get('players') or []):
-                player_found_in_roster = True
-                
-                # Se o jogador pertence ao usuário, adicione à lista leagues_with_player
-                if roster.get('owner_id') == user_id:
-                    leagues_with_player.append({
-                        'league_id': league_id,
-                        'league_name': league_name,
-                        'roster_position': services.get_roster_position(player_id, roster, league_id),
-                        'roster_id': roster.get('roster_id')
-                    })
-                    # Não é necessário continuar verificando outros rosters nesta liga
-                    break 
-                
-                # Se o jogador pertence a outro dono, adicione à lista leagues_without_players com status 'TRADE'
-                else:
-                    leagues_without_players.append({
-                        'league_id': league_id,
-                        'league_name': league_name,
-                        'status': 'TRADE'
-                    })
-                    # Não é necessário continuar verificando outros rosters nesta liga
-                    break
-
-        # Se o loop de rosters terminar e o jogador não foi encontrado em nenhum roster,
-        # ele está como 'F.A' (Free Agent)
-        if not player_found_in_roster:
-            leagues_without_players.append({
+        roster = services.get_rostered_index(league_id).get(player_id)
+
+        # Sem roster o jogador está como 'F.A' (Free Agent)
+        if roster is None:
+            leagues_without_players.append({'league_id': league_id, 'league_name': league_name, 'status': 'F.A'})
+        # Se o jogador pertence ao usuário, adicione à lista leagues_with_player
+        elif roster.get('owner_id') == user_id:
+            leagues_with_player.append({
                 'league_id': league_id,
                 'league_name': league_name,
-                'status': 'F.A'
+                'roster_position': services.get_roster_position(player_id, roster, league_id),
+                'roster_id': roster.get('roster_id')
             })
-
-    print("Coleção leagues_without_players:")
-    print(leagues_without_players)
- #   leagues_without_player = []
- #   for league in leagues:
- #       if not league or 'league_id' not in league: continue
- #       rosters = services.get_cached_rosters(league.get('league_id')) or []
- #       for roster in rosters:
- #           if roster and roster.get('owner_id') == user_id and player_id in (roster.get('players') or []):
- #               leagues_with_player.append({
- #                   'league_id': league.get('league_id'), 'league_name': league.get('name', 'Unknown'),
- #                   'roster_position': services.get_roster_position(player_id, roster, league.get('league_id')),
- #                   'roster_id': roster.get('roster_id')
- #               })
- #               break
+        # Se o jogador pertence a outro dono, o status é 'TRADE'
+        else:
+            leagues_without_players.append({'league_id': league_id, 'league_name': league_name, 'status': 'TRADE'})
             
     return jsonify({
         'player_name': player_name,
@@ -234,6 +171,19 @@ def player_details():
         'other_leagues': leagues_without_players
     })
 
+@api.route('/players-availability')
+@utils.login_required
+@admission.admission_required
+def players_availability():
+    """Disponibilidade de vários jogadores em todas as ligas do usuário, num único pedido."""
+    player_ids = list(dict.fromkeys(pid for pid in request.args.getlist('player_ids') if pid))
+    if not player_ids: return jsonify(error='Invalid player ids'), 400
+    if len(player_ids) > current_app.config['MAX_AVAILABILITY_PLAYERS']:
+        return jsonify(error='Too many player ids'), 400
+
+    user_id = session['user_id']
+    return jsonify(services.get_players_availability(user_id, player_ids))
+
 @api.route('/refresh-players-cache')
 @utils.login_required
 def refresh_players_cache():
@@ -245,8 +195,8 @@ def refresh_players_cache():
         if os.path.exists(players_cache_file):
             os.remove(players_cache_file)
             
-        # 2. Chama a função de serviço para buscar e recriar o cache
-        services.get_all_players()
+        # 2. Chama a função de serviço para buscar e recriar o cache (esperando pela atualização)
+        services.get_all_players(force_refresh=True)
         
         return jsonify(success=True, message='Cache de jogadores atualizado com sucesso!')
     except Exception as e:
@@ -0,0 +1,155 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+# Manutenção pesada em CPU (parse do feed, índices, agregação de logs) corre num processo
+# separado, para não segurar o GIL das threads que atendem pedidos.
+# Custos: cada worker do gunicorn tem o seu pool, e cada processo do pool importa a app e
+# carrega o snapshot de jogadores (dezenas de MB por worker). O resultado volta por pickle e
+# é reconstruído na thread do pedido (~176 ms para o índice de busca com 4k jogadores, contra
+# ~630 ms para construí-lo) e, a partir da primeira atualização, deixa de partilhar as páginas
+# copy-on-write do master. Em dynos pequenos, BACKGROUND_WORKERS=0 executa tudo inline.
+_settings = {'workers': 1}
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+_in_flight = {}
+_published = {}
+_inline = threading.local()
+
+
+def init_app(config):
+    _settings['workers'] = config['BACKGROUND_WORKERS']
+
+
+@contextmanager
+def inline():
+    """Executa as tarefas na própria thread (ex.: warm-up no master do gunicorn, antes do fork)."""
+    _inline.active = True
+    try:
+        yield
+    finally:
+        _inline.active = False
+
+
+def is_inline():
+    return getattr(_inline, 'active', False)
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # Um pool herdado via fork não funciona no processo filho: cria um novo por processo
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ProcessPoolExecutor(
+            max_workers=_settings['workers'], mp_context=multiprocessing.get_context('spawn')
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    _executor = None
+
+
+def _run_inline(fn, args):
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def submit(key, fn, *args, publish_as=None):
+    """
+    Agenda `fn(*args)` no pool de processos. Pedidos com a mesma `key` em curso partilham
+    o mesmo Future. Com `publish_as`, o resultado (versão, valor) é publicado ao terminar.
+    """
+    if _settings['workers'] <= 0 or is_inline():
+        future = _run_inline(fn, args)
+    else:
+        with _lock:
+            future = _in_flight.get(key)
+            if future is not None:
+                return future
+            try:
+                future = _get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                logging.error("Background process pool is broken, recreating it")
+                _reset_executor()
+                future = _get_executor().submit(fn, *args)
+            _in_flight[key] = future
+
+        def _done(f):
+            with _lock:
+                if _in_flight.get(key) is f:
+                    del _in_flight[key]
+            if f.exception() is not None:
+                logging.error(f"Background task '{key}' failed: {f.exception()}")
+        future.add_done_callback(_done)
+
+    if publish_as:
+        future.add_done_callback(lambda f: f.exception() is None and publish(publish_as, *f.result()))
+    return future
+
+
+def publish(name, version, value):
+    # Troca de referência num dict: as threads de pedido veem o valor antigo ou o novo, nunca parcial
+    _published[name] = (version, value)
+
+
+def get_published(name):
+    return _published.get(name)
+
+
+def clear_published():
+    _published.clear()
+
+
+# --- TAREFAS (executadas no processo de manutenção) ---
+def _load_snapshot(cache_file):
+    from . import jsonlib
+    if not os.path.exists(cache_file):
+        return None, {}
+    version = os.path.getmtime(cache_file)
+    return version, jsonlib.load_file(cache_file)
+
+
+def refresh_players(url, cache_file, timeout):
+    """Descarrega, filtra e grava o snapshot de jogadores. Retorna o número de jogadores ativos."""
+    from . import services
+    players = services.sleeper_request(
+        url, timeout=timeout, keep_stale=False,
+        parse=lambda response: services.stream_active_players(response, cache_file)
+    )
+    return len(players or {})
+
+
+def build_search_index(cache_file):
+    from .search import PlayerSearchIndex
+    version, players = _load_snapshot(cache_file)
+    return version, PlayerSearchIndex(players)
+
+
+def build_player_index(cache_file):
+    from . import services
+    version, players = _load_snapshot(cache_file)
+    return version, services.build_player_index(players)
+
+
+def build_nfl_teams(cache_file):
+    from . import services
+    version, players = _load_snapshot(cache_file)
+    return version, services.build_nfl_teams(players)
+
+
+def aggregate_access_log(log_file):
+    from . import jsonlib
+    from .admin.routes import process_access_logs
+    logs = jsonlib.load_file(log_file) if os.path.exists(log_file) else []
+    return process_access_logs(logs)
@@ -0,0 +1,213 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def approx_sizeof(obj, _seen=None):
+    """Tamanho aproximado em bytes de um objeto e do que ele contém (dicts, listas, strings...)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += approx_sizeof(key, _seen) + approx_sizeof(value, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += approx_sizeof(item, _seen)
+    return size
+
+
+class LockedCache:
+    """
+    Envolve um cache do cachetools (que não é thread-safe) com um lock, para ser
+    partilhado pelas threads do worker gthread. Mesma interface de dict.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._cache[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._cache
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._cache.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'expires', 'hits', 'priority')
+
+    def __init__(self, value, size, expires):
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.hits = 1
+        self.priority = 0.0
+
+
+class BudgetedCache:
+    """
+    Cache em memória com orçamento em bytes por namespace e expulsão GDSF
+    (Greedy-Dual-Size-Frequency): sai primeiro o que tem menos acessos por byte,
+    com envelhecimento para que entradas antigas não fiquem para sempre.
+    Interface de dict (get, [], in, clear), como os caches do cachetools.
+    """
+
+    def __init__(self, budgets, namespace_of=None, ttu=None, timer=time.monotonic, sizeof=approx_sizeof):
+        self.budgets = dict(budgets)
+        self._namespace_of = namespace_of or (lambda key: 'default')
+        self._ttu = ttu
+        self._timer = timer
+        self._sizeof = sizeof
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._bytes = Counter()
+        self._clock = Counter()   # valor de envelhecimento (L) do GDSF por namespace
+        self._stats = {namespace: Counter() for namespace in self.budgets}
+
+    def configure(self, budgets):
+        with self._lock:
+            self.budgets = dict(budgets)
+            for namespace in self.budgets:
+                self._stats.setdefault(namespace, Counter())
+            for namespace in list(self._bytes):
+                self._evict(namespace, 0, self._timer())
+
+    def _priority(self, namespace, entry):
+        return self._clock[namespace] + entry.hits / max(entry.size, 1)
+
+    def _remove(self, key, reason):
+        entry = self._entries.pop(key)
+        namespace = self._namespace_of(key)
+        self._bytes[namespace] -= entry.size
+        self._stats.setdefault(namespace, Counter())[reason] += 1
+        return entry
+
+    def _purge_expired(self, namespace, now):
+        expired = [key for key, entry in self._entries.items()
+                   if entry.expires is not None and entry.expires <= now and self._namespace_of(key) == namespace]
+        for key in expired:
+            self._remove(key, 'expirations')
+
+    def _evict(self, namespace, incoming, now):
+        """Liberta espaço no namespace até caber `incoming` bytes."""
+        budget = self.budgets.get(namespace, 0)
+        if self._bytes[namespace] + incoming <= budget:
+            return
+        self._purge_expired(namespace, now)
+        while self._bytes[namespace] + incoming > budget:
+            candidates = [(entry.priority, key) for key, entry in self._entries.items()
+                          if self._namespace_of(key) == namespace]
+            if not candidates:
+                return
+            priority, key = min(candidates, key=lambda c: c[0])
+            self._clock[namespace] = priority
+            self._remove(key, 'evictions')
+
+    def __setitem__(self, key, value):
+        namespace = self._namespace_of(key)
+        size = self._sizeof(value)
+        with self._lock:
+            now = self._timer()
+            if key in self._entries:
+                self._remove(key, 'replacements')
+            stats = self._stats.setdefault(namespace, Counter())
+            if size > self.budgets.get(namespace, 0):
+                stats['rejected'] += 1
+                return
+            self._evict(namespace, size, now)
+            expires = self._ttu(key, value, now) if self._ttu else None
+            entry = _Entry(value, size, expires)
+            entry.priority = self._priority(namespace, entry)
+            self._entries[key] = entry
+            self._bytes[namespace] += size
+
+    def _lookup(self, key, count):
+        with self._lock:
+            namespace = self._namespace_of(key)
+            stats = self._stats.setdefault(namespace, Counter())
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires <= self._timer():
+                self._remove(key, 'expirations')
+                entry = None
+            if count:
+                stats['hits' if entry is not None else 'misses'] += 1
+            if entry is not None and count:
+                entry.hits += 1
+                entry.priority = self._priority(namespace, entry)
+            return entry
+
+    def get(self, key, default=None):
+        entry = self._lookup(key, count=True)
+        return entry.value if entry is not None else default
+
+    def __getitem__(self, key):
+        entry = self._lookup(key, count=True)
+        if entry is None:
+            raise KeyError(key)
+        return entry.value
+
+    def __contains__(self, key):
+        return self._lookup(key, count=False) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key, 'removals').value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes.clear()
+            self._clock.clear()
+
+    def stats(self):
+        """Por namespace: entradas, bytes, orçamento, taxa de acerto e contadores de expulsão."""
+        with self._lock:
+            entries = Counter(self._namespace_of(key) for key in self._entries)
+            report = {}
+            for namespace, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                report[namespace] = {
+                    'entries': entries[namespace],
+                    'bytes': self._bytes[namespace],
+                    'budget_bytes': self.budgets.get(namespace, 0),
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'hit_rate': round(stats['hits'] / lookups, 3) if lookups else None,
+                    'evictions': stats['evictions'],
+                    'expirations': stats['expirations'],
+                    'rejected': stats['rejected']
+                }
+            return report
@@ -18,10 +18,75 @@ class Config:
     SPORT = 'nfl'
     CURRENT_SEASON = "2025"
     TOPN = 6
+    MAX_AVAILABILITY_PLAYERS = 100
+    MAX_SEARCH_RESULTS = 50
+    PLAYER_INDEX_MAX_AGE = 31536000  # a URL muda a cada snapshot, por isso pode ficar em cache 1 ano
     CACHE_DIR = 'cache'
     ACCESS_LOG_FILE = os.path.join(CACHE_DIR, 'access_log.json')
     PLAYERS_CACHE_FILE = os.path.join(CACHE_DIR, 'players_cache.json')
 
+    # Cliente Sleeper (limite oficial ~1000 pedidos/min por IP). Cada processo tem o seu token bucket,
+    # por isso o orçamento é dividido pelos workers do gunicorn (WEB_CONCURRENCY). Com 2 workers,
+    # 900/min + 2 bursts de 30 ficam em ~960/min; os processos de manutenção só fazem o download
+    # do feed de jogadores (1 pedido por atualização).
+    SLEEPER_RATE_BUDGET = int(os.getenv('SLEEPER_RATE_BUDGET', 900))  # pedidos/minuto por IP
+    SLEEPER_RATE_LIMIT = float(os.getenv(
+        'SLEEPER_RATE_LIMIT', SLEEPER_RATE_BUDGET / 60 / max(int(os.getenv('WEB_CONCURRENCY', 2)), 1)
+    ))  # pedidos/segundo por worker
+    SLEEPER_RATE_BURST = int(os.getenv('SLEEPER_RATE_BURST', 30))
+    SLEEPER_BREAKER_THRESHOLD = 3   # pedidos falhados seguidos até abrir o circuito
+    SLEEPER_BREAKER_RESET = 30      # segundos até ao pedido de teste (half-open)
+
+    # Rosters: 'incremental' aplica as transações da liga ao estado local; 'full' refaz o fetch completo
+    ROSTER_SYNC_MODE = os.getenv('ROSTER_SYNC_MODE', 'incremental')
+    # Ao expirar o TTL de rosters só se leem as transações; mudanças de lineup não geram transações,
+    # por isso um fetch completo é forçado após este intervalo (starters com até 30 min)...
+    ROSTER_FULL_SYNC_INTERVAL = 1800
+    # ...ou após este nas janelas de inativos e de jogo (starters com até 5 min, como antes da sincronização)
+    ROSTER_LINEUP_SYNC_INTERVAL = 300
+
+    # Controlo de admissão dos endpoints com fan-out (por worker). Com 8 threads por worker,
+    # 4 em execução + 2 em espera (na fila ou por um pedido idêntico) deixam sempre threads
+    # livres para busca e depth chart.
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', 4))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 2))
+    ADMISSION_QUEUE_TIMEOUT = 5     # segundos máximos na fila antes de 503
+    ADMISSION_PER_USER = 2          # pedidos caros em curso por usuário, incluindo os que esperam por um idêntico
+    ADMISSION_RETRY_AFTER = 5       # valor do header Retry-After (segundos)
+
+    # Orçamento de memória (bytes, aproximado) por namespace dos caches in-memory, por worker.
+    # Ao passar do orçamento sai primeiro o que tem menos acessos por byte (GDSF).
+    CACHE_BUDGETS = {
+        'leagues': 2 * 1024 * 1024,
+        'rosters': 16 * 1024 * 1024,
+        'settings': 4 * 1024 * 1024,
+        'state': 64 * 1024,
+        'roster_sync': 16 * 1024 * 1024,
+        'rostered_index': 16 * 1024 * 1024,
+        'stale': 8 * 1024 * 1024
+    }
+
+    # Processos para manutenção pesada em CPU (snapshot, índices, logs), por worker do gunicorn;
+    # 0 executa na própria thread e poupa a memória de um processo extra por worker
+    BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 1))
+
+    # Validade dos caches: 'nfl' segue o calendário da NFL; 'fixed' mantém a regra antiga noite/manhã
+    FRESHNESS_POLICY = os.getenv('FRESHNESS_POLICY', 'nfl')
+    # Ficheiro opcional com os kickoffs da temporada: {"kickoffs": ["2025-09-07T13:00:00-04:00", ...]}
+    NFL_SCHEDULE_FILE = os.path.join(CACHE_DIR, 'nfl_schedule.json')
+    # Uma falha ao obter o estado da NFL fica em cache só este tempo (segundos)
+    NFL_STATE_FAILURE_TTL = 60
+    # TTL em segundos por fase e tipo de dado (None = até ao fim da fase)
+    FRESHNESS_TTLS = {
+        'inactives':   {'players': 120,   'rosters': 60,   'settings': 3600,  'leagues': 900,   'state': 300},
+        'game_window': {'players': 300,   'rosters': 120,  'settings': 3600,  'leagues': 900,   'state': 300},
+        'gameday':     {'players': 900,   'rosters': 300,  'settings': 3600,  'leagues': 1800,  'state': 900},
+        'week':        {'players': 1800,  'rosters': 600,  'settings': 21600, 'leagues': 3600,  'state': 3600},
+        'midweek':     {'players': 3600,  'rosters': 900,  'settings': 21600, 'leagues': 3600,  'state': 3600},
+        'overnight':   {'players': None,  'rosters': 900,  'settings': 21600, 'leagues': 3600,  'state': 3600},
+        'offseason':   {'players': 43200, 'rosters': 3600, 'settings': 86400, 'leagues': 21600, 'state': 21600},
+    }
+
     ADMIN_CREDENTIALS = {
         'username': os.getenv('ADMIN_USERNAME'),
         'password': os.getenv('ADMIN_PASSWORD')
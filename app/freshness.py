@@ -0,0 +1,181 @@
+import os
+import threading
+import time as time_module
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
+from . import jsonlib
+
+# O calendário da NFL é definido em horário da costa leste
+NFL_TZ = ZoneInfo('America/New_York')
+
+# Horários habituais de kickoff (ET) por dia da semana (0 = segunda), usados sem ficheiro de calendário
+DEFAULT_KICKOFF_SLOTS = {
+    0: [time(20, 15)],
+    3: [time(20, 15)],
+    6: [time(13, 0), time(16, 5), time(16, 25), time(20, 20)]
+}
+INACTIVES_LEAD = timedelta(minutes=120)   # listas de inativos saem ~90 min antes do kickoff
+GAME_DURATION = timedelta(hours=3, minutes=30)
+OVERNIGHT_END = time(7, 0)
+
+
+def _seconds_between(start, end):
+    """Duração real entre dois instantes; subtrair datetimes da mesma zona ignora a mudança de hora."""
+    return end.timestamp() - start.timestamp()
+
+
+def _fallback_season_type(now):
+    """Estimativa da fase da temporada quando o estado do Sleeper não está disponível."""
+    if now.month in (9, 10, 11, 12, 1) or (now.month == 2 and now.day < 15):
+        return 'regular'
+    if now.month == 8:
+        return 'pre'
+    return 'off'
+
+
+class FreshnessPolicy:
+    """Interface das políticas de validade dos caches."""
+
+    def phase(self, at=None):
+        raise NotImplementedError
+
+    def ttl(self, data_type, at=None):
+        """TTL em segundos para dados do tipo `data_type` obtidos no instante `at` (epoch)."""
+        raise NotImplementedError
+
+    def update_state(self, nfl_state):
+        pass
+
+
+class FixedSchedulePolicy(FreshnessPolicy):
+    """Política antiga: noite até às 6h, 1 hora de manhã e 10 minutos no resto do dia (hora local)."""
+
+    def __init__(self, default_ttl=300):
+        self.default_ttl = default_ttl
+
+    def phase(self, at=None):
+        now = datetime.fromtimestamp(at if at is not None else time_module.time())
+        if now.time() >= time(23, 0) or now.time() < time(6, 0):
+            return 'night'
+        if now.time() < time(10, 0):
+            return 'morning'
+        return 'day'
+
+    def ttl(self, data_type, at=None):
+        if data_type != 'players':
+            return self.default_ttl
+        now = datetime.fromtimestamp(at if at is not None else time_module.time())
+        phase = self.phase(now.timestamp())
+        if phase == 'night':
+            next_6am = now.replace(hour=6, minute=0, second=0, microsecond=0)
+            if now.hour >= 23:
+                next_6am += timedelta(days=1)
+            return (next_6am - now).total_seconds()
+        return 3600 if phase == 'morning' else 600
+
+
+class NFLSchedulePolicy(FreshnessPolicy):
+    """
+    TTLs guiados pelo calendário da NFL: curtos nas janelas de inativos e de jogo,
+    longos a meio da semana e fora da temporada. Usa o estado da NFL do Sleeper
+    e, se existir, um ficheiro local com os kickoffs; senão assume os horários habituais.
+    """
+
+    def __init__(self, ttls, schedule_file=None):
+        self.ttls = ttls
+        self.schedule_file = schedule_file
+        self._nfl_state = None
+        self._schedule = None
+        self._schedule_mtime = None
+        self._lock = threading.Lock()
+
+    def update_state(self, nfl_state):
+        self._nfl_state = nfl_state
+
+    def _load_schedule(self):
+        """Lê o ficheiro de calendário ({"kickoffs": [ISO 8601, ...]}), recarregando se mudar."""
+        if not self.schedule_file or not os.path.exists(self.schedule_file):
+            return None
+        try:
+            mtime = os.path.getmtime(self.schedule_file)
+            with self._lock:
+                if mtime != self._schedule_mtime:
+                    kickoffs = jsonlib.load_file(self.schedule_file).get('kickoffs', [])
+                    parsed = []
+                    for value in kickoffs:
+                        kickoff = datetime.fromisoformat(value)
+                        if kickoff.tzinfo is None:
+                            kickoff = kickoff.replace(tzinfo=NFL_TZ)
+                        parsed.append(kickoff.astimezone(NFL_TZ))
+                    self._schedule = sorted(parsed)
+                    self._schedule_mtime = mtime
+                return self._schedule
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _kickoffs_near(self, now):
+        start, end = now - timedelta(days=1), now + timedelta(days=8)
+        schedule = self._load_schedule()
+        if schedule:
+            return [k for k in schedule if start <= k <= end]
+
+        kickoffs = []
+        for offset in range(-1, 9):
+            day = (now + timedelta(days=offset)).date()
+            for slot in DEFAULT_KICKOFF_SLOTS.get(day.weekday(), []):
+                kickoffs.append(datetime.combine(day, slot, tzinfo=NFL_TZ))
+        return kickoffs
+
+    def _season_type(self, now):
+        state = self._nfl_state or {}
+        return state.get('season_type') or _fallback_season_type(now)
+
+    def _phase_at(self, now):
+        """Retorna (fase, fim da fase ou None) para um instante em ET."""
+        if self._season_type(now) == 'off':
+            return 'offseason', None
+
+        kickoffs = self._kickoffs_near(now)
+        for kickoff in kickoffs:
+            if kickoff - INACTIVES_LEAD <= now < kickoff:
+                return 'inactives', kickoff
+        for kickoff in kickoffs:
+            if kickoff <= now < kickoff + GAME_DURATION:
+                return 'game_window', kickoff + GAME_DURATION
+
+        if now.time() < OVERNIGHT_END:
+            return 'overnight', now.replace(hour=OVERNIGHT_END.hour, minute=0, second=0, microsecond=0)
+        if any(k.date() == now.date() for k in kickoffs):
+            return 'gameday', None
+        if now.weekday() in (1, 2):
+            return 'midweek', None
+        return 'week', None
+
+    def phase(self, at=None):
+        now = datetime.fromtimestamp(at if at is not None else time_module.time(), NFL_TZ)
+        return self._phase_at(now)[0]
+
+    def ttl(self, data_type, at=None):
+        now = datetime.fromtimestamp(at if at is not None else time_module.time(), NFL_TZ)
+        phase, phase_end = self._phase_at(now)
+        ttl = self.ttls[phase].get(data_type)
+        # None significa "válido até ao fim da fase" (ex.: durante a madrugada)
+        if ttl is None:
+            ttl = _seconds_between(now, phase_end) if phase_end else self.ttls['week'][data_type]
+
+        if phase == 'offseason' or ttl <= self.ttls['inactives'][data_type]:
+            return ttl
+
+        # Nunca deixa um dado atravessar o início da próxima janela de inativos
+        for kickoff in self._kickoffs_near(now):
+            inactives_start = kickoff - INACTIVES_LEAD
+            if inactives_start > now:
+                ttl = min(ttl, max(_seconds_between(now, inactives_start), self.ttls['inactives'][data_type]))
+                break
+        return ttl
+
+
+def create_policy(config):
+    if config['FRESHNESS_POLICY'] == 'fixed':
+        return FixedSchedulePolicy()
+    return NFLSchedulePolicy(config['FRESHNESS_TTLS'], config['NFL_SCHEDULE_FILE'])
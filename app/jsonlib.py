@@ -0,0 +1,70 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+# orjson é opcional: sem ele tudo continua a funcionar com o json da stdlib
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+BACKEND = 'orjson' if orjson else 'json'
+
+
+def loads(data):
+    """Faz o parse de str ou bytes."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Serializa em JSON compacto (UTF-8, sem escapes ASCII) e retorna str."""
+    return dumpb(obj).decode('utf-8')
+
+
+def dumpb(obj):
+    """Serializa em JSON compacto e retorna bytes, prontos para gravar ou enviar."""
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass  # ex.: inteiros acima de 64 bits; a stdlib trata
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def load_file(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path):
+    with open(path, 'wb') as f:
+        f.write(dumpb(obj))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider do Flask que usa orjson quando disponível (mesma ordenação de chaves do padrão)."""
+
+    _ORJSON_KWARGS = {'indent', 'sort_keys', 'ensure_ascii', 'separators'}
+
+    def dumps(self, obj, **kwargs):
+        # Fora do modo debug, response() pede separators=(',', ':'), que é a saída normal do orjson
+        separators = kwargs.get('separators')
+        compact = separators is None or tuple(separators) == (',', ':') or kwargs.get('indent')
+        if orjson is None or set(kwargs) - self._ORJSON_KWARGS or not compact:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+# --- RATE LIMITER ---
+class TokenBucket:
+    """
+    Token bucket partilhado entre as threads do worker.
+    Mantém o ritmo de pedidos ao Sleeper abaixo do orçamento configurado.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, rate, capacity):
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = float(capacity)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait=5.0):
+        """Consome um token, esperando no máximo `max_wait` segundos. Retorna False se esgotar o tempo."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else max_wait
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# --- CIRCUIT BREAKER ---
+class CircuitBreaker:
+    """
+    Circuit breaker por endpoint.
+    closed -> open após `failure_threshold` falhas seguidas; após `reset_timeout`
+    deixa passar um único pedido de teste (half-open).
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def cancel_request(self):
+        """O pedido autorizado não chegou a ser feito (ex.: rate limit local): liberta o teste sem mudar o estado."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures}
+
+
+class BreakerRegistry:
+    """Mantém um CircuitBreaker por endpoint (template do path, sem IDs)."""
+
+    # Segmentos cujo próximo valor é um identificador variável
+    ID_PARENTS = {'user', 'league', 'draft', 'transactions', 'matchups'}
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def configure(self, failure_threshold, reset_timeout):
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.reset_timeout = reset_timeout
+            for breaker in self._breakers.values():
+                breaker.failure_threshold = failure_threshold
+                breaker.reset_timeout = reset_timeout
+
+    @classmethod
+    def endpoint_key(cls, url):
+        parts = [p for p in urlparse(url).path.split('/') if p]
+        key = []
+        for i, part in enumerate(parts):
+            if part.isdigit() or (i > 0 and parts[i - 1] in cls.ID_PARENTS):
+                key.append('*')
+            else:
+                key.append(part)
+        return '/'.join(key)
+
+    def get(self, url):
+        key = self.endpoint_key(url)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._breakers.items())
+        return {key: breaker.snapshot() for key, breaker in items}
+
+
+def backoff_delay(attempt, base=0.25, cap=2.0):
+    """Backoff exponencial com full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,166 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+# Apóstrofos e pontos juntam as partes ("O'Neil" -> "oneil", "St." -> "st"); o resto separa palavras.
+# Nos nomes indexados, hífens também podem juntar as partes ("Amon-Ra" -> "amonra")
+_JOINERS = re.compile(r"[.'’`´]")
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+_NAME_PUNCTUATION = re.compile(r"[.'’`´-]")
+
+
+def _fold(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def normalize(text):
+    """Minúsculas, sem acentos nem pontuação, com espaços simples."""
+    text = _JOINERS.sub('', _fold(text))
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def name_tokens(text):
+    """
+    Tokens de um nome nas duas formas, pontuação colada e separada, para que
+    "jamarr" e "ja marr", "amonra" e "amon ra", "dk" e "d k" encontrem o mesmo jogador.
+    """
+    text = _fold(text)
+    joined = _SEPARATORS.sub(' ', _NAME_PUNCTUATION.sub('', text)).split()
+    split = _SEPARATORS.sub(' ', text).split()
+    return set(joined) | set(split)
+
+
+def _max_distance(token):
+    if len(token) >= 8:
+        return 2
+    if len(token) >= 4:
+        return 1
+    return 0
+
+
+def _deletes(token, distance):
+    """Variantes do token com até `distance` caracteres removidos (SymSpell)."""
+    variants, frontier = {token}, {token}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def _edit_distance(a, b, limit):
+    """Distância de Damerau-Levenshtein (OSA), interrompida quando passa de `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class PlayerSearchIndex:
+    """
+    Índice de busca sobre um snapshot de jogadores: prefixos por token (bisect)
+    e correção de erros de digitação via dicionário de deletes (SymSpell).
+    """
+
+    def __init__(self, players):
+        self.entries = []
+        self._token_entries = defaultdict(set)
+        self._deletes = {}
+
+        for player_id, player in players.items():
+            full_name = player.get('full_name')
+            if not full_name:
+                full_name = f"{player.get('first_name', '')} {player.get('last_name', '')}".strip()
+            if not full_name:
+                continue
+            idx = len(self.entries)
+            # Só o necessário para filtrar e ordenar; o resto é lido do snapshot de jogadores
+            self.entries.append((player_id, full_name, tuple(player.get('fantasy_positions') or ()), player.get('search_rank')))
+            for token in name_tokens(full_name):
+                self._token_entries[token].add(idx)
+
+        # Quase todas as variantes apontam para um único token: guarda a string e só usa lista se colidir
+        for token in self._token_entries:
+            for variant in _deletes(token, _max_distance(token)):
+                current = self._deletes.get(variant)
+                if current is None:
+                    self._deletes[variant] = token
+                elif isinstance(current, list):
+                    current.append(token)
+                else:
+                    self._deletes[variant] = [current, token]
+        self._sorted_tokens = sorted(self._token_entries)
+
+    def _prefix_tokens(self, prefix):
+        start = bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def _token_matches(self, query_token):
+        """Custo de cada entrada para um token da busca: 0 exato, 0.5 prefixo, distância se aproximado."""
+        costs = {}
+
+        def add(token, cost):
+            for idx in self._token_entries[token]:
+                if cost < costs.get(idx, float('inf')):
+                    costs[idx] = cost
+
+        if query_token in self._token_entries:
+            add(query_token, 0)
+        for token in self._prefix_tokens(query_token):
+            if token != query_token:
+                add(token, 0.5)
+
+        limit = _max_distance(query_token)
+        if limit:
+            candidates = set()
+            for variant in _deletes(query_token, limit):
+                tokens = self._deletes.get(variant)
+                if isinstance(tokens, list):
+                    candidates.update(tokens)
+                elif tokens is not None:
+                    candidates.add(tokens)
+            for token in candidates:
+                distance = _edit_distance(query_token, token, limit)
+                if 0 < distance <= limit:
+                    add(token, distance)
+        return costs
+
+    def search(self, query, positions=None, limit=20):
+        """Retorna até `limit` tuplos (player_id, nome) ordenados por relevância."""
+        query_tokens = normalize(query).split()
+        if not query_tokens:
+            return []
+
+        scores = None
+        for query_token in query_tokens:
+            costs = self._token_matches(query_token)
+            if scores is None:
+                scores = costs
+            else:
+                scores = {idx: scores[idx] + cost for idx, cost in costs.items() if idx in scores}
+            if not scores:
+                return []
+
+        results = []
+        for idx, score in scores.items():
+            player_id, full_name, fantasy_positions, search_rank = self.entries[idx]
+            if positions is not None and not any(pos in positions for pos in fantasy_positions):
+                continue
+            results.append((score, search_rank or float('inf'), full_name, player_id))
+
+        results.sort(key=lambda r: (r[0], r[1], r[2]))
+        return [(r[3], r[2]) for r in results[:limit]]
@@ -1,84 +1,404 @@
+import hashlib
+import threading
 import requests
 from flask import current_app
 from concurrent.futures import ThreadPoolExecutor
-from . import utils
+from . import background, jsonlib, utils
+from .config import Config
+from .resilience import TokenBucket, BreakerRegistry, backoff_delay
 import time
 import logging
 from collections import defaultdict
 
+# --- CLIENTE SLEEPER: RATE LIMIT E CIRCUIT BREAKER ---
+# Partilhados por todas as threads do worker (os pedidos em ThreadPoolExecutor
+# correm sem app context, por isso não dependem de current_app)
+SLEEPER_RATE_LIMITER = TokenBucket(Config.SLEEPER_RATE_LIMIT, Config.SLEEPER_RATE_BURST)
+SLEEPER_BREAKERS = BreakerRegistry(Config.SLEEPER_BREAKER_THRESHOLD, Config.SLEEPER_BREAKER_RESET)
+SLEEPER_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Configuração da sincronização de rosters (lida fora do app context, como acima)
+ROSTER_SYNC_SETTINGS = {
+    'mode': Config.ROSTER_SYNC_MODE,
+    'full_sync_interval': Config.ROSTER_FULL_SYNC_INTERVAL,
+    'lineup_sync_interval': Config.ROSTER_LINEUP_SYNC_INTERVAL
+}
+
+def init_sleeper_client(config):
+    """Aplica a configuração da app ao rate limiter, aos circuit breakers e à sincronização de rosters."""
+    SLEEPER_RATE_LIMITER.configure(config['SLEEPER_RATE_LIMIT'], config['SLEEPER_RATE_BURST'])
+    SLEEPER_BREAKERS.configure(config['SLEEPER_BREAKER_THRESHOLD'], config['SLEEPER_BREAKER_RESET'])
+    ROSTER_SYNC_SETTINGS['mode'] = config['ROSTER_SYNC_MODE']
+    ROSTER_SYNC_SETTINGS['full_sync_interval'] = config['ROSTER_FULL_SYNC_INTERVAL']
+    ROSTER_SYNC_SETTINGS['lineup_sync_interval'] = config['ROSTER_LINEUP_SYNC_INTERVAL']
+
+def _stale_response(url):
+    stale = utils.STALE_RESPONSE_CACHE.get(url)
+    if stale is not None:
+        logging.warning(f"Serving stale data for URL: {url}")
+    return stale
+
 # --- FUNÇÕES DE REQUEST À API SLEEPER ---
-def sleeper_request(url, timeout=10):
+def sleeper_request(url, timeout=10, keep_stale=True, parse=None):
     """
-    Faz um pedido à API do Sleeper com lógica de retry.
-    Tenta até 3 vezes com um segundo de espera entre as falhas.
+    Faz um pedido à API do Sleeper com rate limit, circuit breaker e retry.
+    Tenta até 3 vezes com backoff exponencial (com jitter) entre as falhas.
+    Se o endpoint estiver em falha, devolve a última resposta válida (stale) ou None.
+    Com `parse`, a resposta é lida em streaming e entregue a essa função em vez de response.json().
     """
+    breaker = SLEEPER_BREAKERS.get(url)
+    if not breaker.allow_request():
+        logging.warning(f"Circuit open, skipping request: {url}")
+        return _stale_response(url)
+
     for attempt in range(3):
+        if not SLEEPER_RATE_LIMITER.acquire(max_wait=timeout):
+            logging.warning(f"Rate limit budget exhausted for URL: {url}")
+            if attempt == 0:
+                # O limite é nosso, não uma falha do Sleeper: não conta para o circuit breaker
+                breaker.cancel_request()
+                return _stale_response(url)
+            break
         try:
-            response = requests.get(url, timeout=timeout)
-            if response.status_code == 200:
-                return response.json()
-            
-            # Se o status não for 200, regista o aviso e tenta novamente
+            with requests.get(url, timeout=timeout, stream=parse is not None) as response:
+                if response.status_code == 200:
+                    data = parse(response) if parse else jsonlib.loads(response.content)
+                    breaker.record_success()
+                    if keep_stale and data is not None:
+                        utils.STALE_RESPONSE_CACHE[url] = data
+                    return data
+
+            # Erros 4xx (exceto 429) não melhoram com retry
+            if response.status_code not in SLEEPER_RETRY_STATUSES:
+                logging.warning(f"Request failed: {url} - Status {response.status_code}")
+                breaker.record_success()
+                return None
+
+            # Se o status for transitório, regista o aviso e tenta novamente
             logging.warning(f"Request failed on attempt {attempt + 1}/3: {url} - Status {response.status_code}")
 
-        except requests.exceptions.RequestException as e:
-            # Se for um erro de rede/timeout, regista o erro e tenta novamente
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # Se for um erro de rede/timeout/JSON inválido, regista o erro e tenta novamente
             logging.error(f"Request error on attempt {attempt + 1}/3: {url} - {str(e)}")
-        
-        # Espera 1 segundo antes da próxima tentativa
-        time.sleep(1)
-        
-    # Se todas as 3 tentativas falharem, retorna None
-    logging.error(f"All 3 attempts failed for URL: {url}")
-    return None
+        except Exception:
+            # Erro local (ex.: disco cheio ao gravar o stream): não conta como falha do Sleeper,
+            # mas liberta o pedido de teste para o breaker não ficar preso em half-open
+            breaker.cancel_request()
+            raise
+
+        if attempt < 2:
+            time.sleep(backoff_delay(attempt))
+
+    # Se todas as tentativas falharem, abre o circuito (se atingir o limite) e usa dados stale
+    breaker.record_failure()
+    logging.error(f"All attempts failed for URL: {url}")
+    return _stale_response(url)
 
 def get_user_id(username):
     user_data = sleeper_request(f'https://api.sleeper.app/v1/user/{username}', timeout=5)
     return user_data.get('user_id') if user_data else None
 
 # --- FUNÇÕES DE DADOS COM CACHE ---
-def get_all_players():
+# Campos dos jogadores usados pela app; o resto do feed é descartado na leitura
+PLAYER_FIELDS = (
+    'player_id', 'full_name', 'first_name', 'last_name', 'position', 'fantasy_positions',
+    'team', 'status', 'injury_status', 'active', 'depth_chart_position', 'depth_chart_order',
+    'search_rank'
+)
+
+def _iter_active_players(items):
+    for pid, pdata in items:
+        if isinstance(pdata, dict) and pdata.get('active') is True:
+            yield pid, {field: pdata[field] for field in PLAYER_FIELDS if field in pdata}
+
+def stream_active_players(response, players_cache_file):
+    """Lê o feed de jogadores em blocos, filtra os ativos e grava-os direto no cache em disco."""
+    items = utils.iter_json_object_items(response.iter_content(chunk_size=64 * 1024))
+    return utils.save_players_stream(_iter_active_players(items), players_cache_file)
+
+def get_all_players(force_refresh=False):
     try:
+        # Mantém o estado da NFL atualizado para a política de validade, sem esperar pelo Sleeper
+        refresh_nfl_state_in_background()
         cached_data, _ = utils.load_players_from_disk()
-        if cached_data:
+        if cached_data and not force_refresh:
             return cached_data
-            
-        players = sleeper_request(f"https://api.sleeper.app/v1/players/{current_app.config['SPORT']}", timeout=15)
-        if not players:
+
+        # Download, filtro e gravação correm no processo de manutenção
+        future = background.submit(
+            'players', background.refresh_players,
+            f"https://api.sleeper.app/v1/players/{current_app.config['SPORT']}",
+            current_app.config['PLAYERS_CACHE_FILE'], 15
+        )
+        # Enquanto atualiza, continua a servir o snapshot anterior
+        stale = utils.PLAYERS_CACHE_IN_MEMORY.get('players')
+        if stale and not force_refresh:
+            return stale[1]
+
+        if not future.result():
             logging.warning("Resposta vazia da API de jogadores")
             return {}
-            
-        active_players = {
-            pid: pdata for pid, pdata in players.items() if pdata.get('active') is True
-        }
-        
-        utils.save_players_to_disk(active_players)
-        return active_players
+        cached_data, _ = utils.load_players_from_disk()
+        return cached_data or {}
     except Exception as e:
         logging.error(f"Erro ao buscar jogadores: {str(e)}", exc_info=True)
         return {}
 
+def _get_derived(name, task):
+    """
+    Dados derivados do snapshot de jogadores (índices, tabelas), reconstruídos no processo
+    de manutenção. Enquanto a nova versão não fica pronta, serve a anterior.
+    """
+    get_all_players()
+    version = utils.get_players_snapshot_version()
+    published = background.get_published(name)
+    if published is not None and published[0] == version:
+        return published[1]
+
+    future = background.submit(name, task, current_app.config['PLAYERS_CACHE_FILE'], publish_as=name)
+    if published is not None:
+        return published[1]
+
+    # Primeira construção neste processo: espera (a thread fica bloqueada sem segurar o GIL)
+    result_version, value = future.result()
+    background.publish(name, result_version, value)
+    return value
+
+def get_player_search_index():
+    """Índice de busca do snapshot atual de jogadores (construído uma vez por snapshot)."""
+    return _get_derived('search_index', background.build_search_index)
+
+def search_players(query, positions, limit=20):
+    all_players = get_all_players()
+    results = []
+    for player_id, full_name in get_player_search_index().search(query, positions, limit):
+        player = all_players.get(player_id, {})
+        results.append({
+            'id': player_id, 
+            'name': full_name,
+            'positions': player.get('fantasy_positions') or [],
+            'status': player.get('status', 'Active'),
+            'status_abbr': current_app.config['STATUS_CONFIG'].get(player.get('status'), {}).get('abbr', ''),
+            'depth_chart_order': player.get('depth_chart_order')
+        })
+    return results
+
+def build_player_index(all_players):
+    """
+    Índice compacto de jogadores para a busca no browser: (versão, bytes JSON).
+    A versão é o hash do conteúdo, para servir com cache imutável.
+    """
+    statuses, status_codes, rows = [], {}, []
+    for player_id, player in all_players.items():
+        full_name = player.get('full_name') or f"{player.get('first_name', '')} {player.get('last_name', '')}".strip()
+        if not full_name:
+            continue
+        status = player.get('status') or 'Active'
+        if status not in status_codes:
+            status_codes[status] = len(statuses)
+            statuses.append(status)
+        rows.append([player_id, full_name, player.get('fantasy_positions') or [], status_codes[status], player.get('depth_chart_order')])
+
+    rows.sort(key=lambda row: row[0])
+    body = {'fields': ['id', 'name', 'positions', 'status', 'depth_chart_order'], 'statuses': statuses, 'players': rows}
+    version = hashlib.sha1(jsonlib.dumpb(body)).hexdigest()[:12]
+    body['version'] = version
+    return version, jsonlib.dumpb(body)
+
+def get_player_index():
+    """Índice compacto do snapshot atual: (versão, bytes JSON)."""
+    return _get_derived('player_index', background.build_player_index)
+
 def get_cached_leagues(user_id):
     cache_key = (user_id, current_app.config['CURRENT_SEASON'])
-    if cache_key in utils.LEAGUE_CACHE:
-        return utils.LEAGUE_CACHE[cache_key]
+    cached = utils.LEAGUE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
     
     leagues = sleeper_request(f"https://api.sleeper.app/v1/user/{user_id}/leagues/nfl/{current_app.config['CURRENT_SEASON']}") or []
     utils.LEAGUE_CACHE[cache_key] = leagues
     return leagues
 
+def get_nfl_state():
+    """Estado atual da NFL (temporada, semana) segundo o Sleeper."""
+    cache_key = 'nfl_state'
+    cached = utils.LEAGUE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    state = sleeper_request('https://api.sleeper.app/v1/state/nfl')
+    if state:
+        utils.FRESHNESS_POLICY.update_state(state)
+    # Uma falha também fica em cache, para não repetir o pedido a cada busca de jogadores
+    utils.LEAGUE_CACHE[cache_key] = state or {}
+    return state or {}
+
+_nfl_state_refresh = threading.Lock()
+
+def refresh_nfl_state_in_background():
+    """
+    Atualiza o estado da NFL numa thread quando o cache expira. Quem chama não espera: a
+    política continua com o último estado conhecido. Só uma atualização corre de cada vez.
+    """
+    # No master do gunicorn (warm-up) não se criam threads antes do fork
+    if background.is_inline() or 'nfl_state' in utils.LEAGUE_CACHE:
+        return
+    if not _nfl_state_refresh.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            get_nfl_state()
+        except Exception as e:
+            logging.error(f"Erro ao atualizar o estado da NFL: {str(e)}")
+        finally:
+            _nfl_state_refresh.release()
+
+    threading.Thread(target=run, daemon=True).start()
+
 def get_cached_rosters(league_id):
-    if league_id in utils.LEAGUE_CACHE:
-        return utils.LEAGUE_CACHE[league_id]
-    
-    rosters = sleeper_request(f'https://api.sleeper.app/v1/league/{league_id}/rosters') or []
+    cached = utils.LEAGUE_CACHE.get(league_id)
+    if cached is not None:
+        return cached
+
+    rosters = None
+    if ROSTER_SYNC_SETTINGS['mode'] == 'incremental':
+        rosters = _sync_rosters_incremental(league_id)
+    if rosters is None:
+        rosters = _fetch_rosters_full(league_id)
+
     utils.LEAGUE_CACHE[league_id] = rosters
     return rosters
 
+def get_rostered_index(league_id, rosters=None):
+    """
+    Mapa player_id -> roster de uma liga. É construído uma vez por atualização dos rosters
+    (a lista em cache é substituída, nunca alterada, quando muda).
+    """
+    if rosters is None:
+        rosters = get_cached_rosters(league_id)
+    entry = utils.ROSTERED_INDEX.get(league_id)
+    if entry is not None and entry[0] is rosters:
+        return entry[1]
+
+    index = {}
+    for roster in rosters or []:
+        if not roster:
+            continue
+        for player_id in roster.get('players') or []:
+            index.setdefault(player_id, roster)
+    utils.ROSTERED_INDEX[league_id] = (rosters, index)
+    return index
+
+# --- SINCRONIZAÇÃO INCREMENTAL DE ROSTERS ---
+def _fetch_rosters_full(league_id):
+    # Transações concluídas antes deste instante já estão refletidas no payload completo
+    fetched_at_ms = int(time.time() * 1000)
+    rosters = sleeper_request(f'https://api.sleeper.app/v1/league/{league_id}/rosters') or []
+    if ROSTER_SYNC_SETTINGS['mode'] == 'incremental' and rosters:
+        state = get_nfl_state() or {}
+        utils.ROSTER_SYNC_STATE[league_id] = {
+            'rosters': rosters,
+            'season': state.get('season'),
+            'week': state.get('week'),
+            'seen_ids': set(),
+            'fetched_at_ms': fetched_at_ms,
+            'full_synced_at': time.time()
+        }
+    return rosters
+
+def _copy_roster(roster):
+    copied = dict(roster)
+    for field in ('players', 'starters', 'reserve', 'taxi'):
+        if roster.get(field) is not None:
+            copied[field] = list(roster[field])
+    return copied
+
+def _apply_transaction(rosters_by_id, transaction):
+    """
+    Aplica as saídas e entradas de uma transação concluída aos rosters.
+    Retorna False se a transação não bater com o estado local (versão divergente).
+    """
+    for player_id, roster_id in (transaction.get('drops') or {}).items():
+        roster = rosters_by_id.get(roster_id)
+        if roster is None or player_id not in (roster.get('players') or []):
+            return False
+        roster['players'].remove(player_id)
+        # Titular dispensado deixa a posição vazia, como o Sleeper faz
+        if roster.get('starters'):
+            roster['starters'] = ['0' if pid == player_id else pid for pid in roster['starters']]
+        for field in ('reserve', 'taxi'):
+            if roster.get(field) and player_id in roster[field]:
+                roster[field].remove(player_id)
+
+    for player_id, roster_id in (transaction.get('adds') or {}).items():
+        roster = rosters_by_id.get(roster_id)
+        if roster is None:
+            return False
+        if roster.get('players') is None:
+            roster['players'] = []
+        if player_id not in roster['players']:
+            roster['players'].append(player_id)
+    return True
+
+def _sync_rosters_incremental(league_id):
+    """
+    Atualiza o roster local de uma liga com as transações desde a última sincronização.
+    Retorna None quando é preciso um refetch completo (sem estado, lacuna de semanas,
+    mudança de temporada, transação que não bate ou fetch completo mais velho que o intervalo).
+    """
+    sync_state = utils.ROSTER_SYNC_STATE.get(league_id)
+    if not sync_state:
+        return None
+    # Mudanças de lineup não geram transações: o fetch completo segue um relógio próprio,
+    # mais curto nas janelas de inativos e de jogo, quando os starters importam
+    max_age = ROSTER_SYNC_SETTINGS['full_sync_interval']
+    if utils.get_freshness_phase() in ('inactives', 'game_window'):
+        max_age = min(max_age, ROSTER_SYNC_SETTINGS['lineup_sync_interval'])
+    if time.time() - sync_state['full_synced_at'] >= max_age:
+        return None
+
+    nfl_state = get_nfl_state()
+    if not nfl_state or nfl_state.get('season') != sync_state['season']:
+        return None
+    last_week, current_week = sync_state['week'], nfl_state.get('week')
+    if last_week is None or current_week is None or not 0 <= current_week - last_week <= 1:
+        return None
+
+    # Na virada de semana, lê também a semana anterior para não perder transações
+    transactions_by_week = {}
+    for week in sorted({last_week, current_week}):
+        week_transactions = sleeper_request(f'https://api.sleeper.app/v1/league/{league_id}/transactions/{week}')
+        if week_transactions is None:
+            return None
+        transactions_by_week[week] = [t for t in week_transactions if t.get('status') == 'complete']
+
+    pending = sorted(
+        (t for week_transactions in transactions_by_week.values() for t in week_transactions
+         if (t.get('status_updated') or 0) > sync_state['fetched_at_ms']
+         and t.get('transaction_id') not in sync_state['seen_ids']),
+        key=lambda t: t.get('status_updated') or 0
+    )
+    if not pending and last_week == current_week:
+        return sync_state['rosters']
+
+    rosters = [_copy_roster(r) for r in sync_state['rosters']]
+    rosters_by_id = {r.get('roster_id'): r for r in rosters}
+    for transaction in pending:
+        if not _apply_transaction(rosters_by_id, transaction):
+            logging.info(f"Roster state mismatch for league {league_id}, falling back to full refetch")
+            return None
+
+    # A semana anterior não volta a ser lida, por isso só guarda os IDs da semana atual
+    seen_ids = {t.get('transaction_id') for t in transactions_by_week[current_week]}
+    utils.ROSTER_SYNC_STATE[league_id] = dict(sync_state, rosters=rosters, week=current_week, seen_ids=seen_ids)
+    return rosters
+
 def get_league_settings(league_id):
     cache_key = f"settings_{league_id}"
-    if cache_key in utils.LEAGUE_CACHE:
-        return utils.LEAGUE_CACHE[cache_key]
+    cached = utils.LEAGUE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
     
     settings = sleeper_request(f'https://api.sleeper.app/v1/league/{league_id}')
     if settings:
@@ -125,64 +445,180 @@ def _process_player_status(player_id, all_players):
         logging.warning(f"Error processing player {player_id}: {str(e)}")
         return {'full_name': f'Player_{player_id[:6]}', 'position': '?', 'team': '?', 'injury_status': 'Unknown'}, 'Unknown'
 
-def get_starters_with_status(user_id, force_refresh=False, show_best_ball=False):
+def get_user_leagues(user_id, force_refresh=False):
+    """Ligas válidas do usuário; com force_refresh, descarta antes os caches das ligas."""
     if force_refresh:
         utils.LEAGUE_CACHE.clear()
+        utils.ROSTER_SYNC_STATE.clear()
+    return [league for league in (get_cached_leagues(user_id) or []) if league and 'league_id' in league]
+
+def get_user_working_set(user_id, force_refresh=False, leagues=None):
+    """
+    Busca uma única vez as ligas do usuário, os rosters e as configurações de cada liga
+    e o mapa de jogadores, para que vários relatórios sejam calculados sobre os mesmos dados.
+    Aceita as ligas já obtidas com get_user_leagues.
+    """
+    if leagues is None:
+        leagues = get_user_leagues(user_id, force_refresh=force_refresh)
+    league_ids = [league['league_id'] for league in leagues]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        settings_futures = [executor.submit(get_league_settings, league_id) for league_id in league_ids]
+        rosters_futures = [executor.submit(get_cached_rosters, league_id) for league_id in league_ids]
+        settings = [future.result() for future in settings_futures]
+        rosters = [future.result() for future in rosters_futures]
+
+    return {
+        'user_id': user_id,
+        'leagues': leagues,
+        'settings': dict(zip(league_ids, settings)),
+        'rosters': dict(zip(league_ids, rosters)),
+        'players': get_all_players()
+    }
+
+def _process_league_issues(league_settings, user_rosters, all_players):
+    roster_positions = league_settings.get('roster_positions', [])
+    league_issues, total_issues = [], 0
+
+    for roster in user_rosters:
+        starters = roster.get('starters', []) or []
+        empty_positions = _process_empty_positions(starters, roster_positions)
+        if empty_positions:
+            league_issues.append({'status': 'Empty Position', 'positions': empty_positions, 'count': len(empty_positions), 'is_empty': True})
+            total_issues += len(empty_positions)
         
-    leagues = get_cached_leagues(user_id)
-    all_players = get_all_players()
+        status_groups = defaultdict(list)
+        for player_id in starters:
+            player, status = _process_player_status(player_id, all_players)
+            if status:
+                # Agora o 'status' já vem formatado corretamente, não precisamos mais do 'if' aqui
+                status_groups[status].append({
+                    'id': player_id, 'name': player.get('full_name'), 'position': player.get('position'),
+                    'team': player.get('team'), 'status': status
+                })
+        
+        for status in current_app.config['STATUS_CONFIG']:
+            if status in status_groups:
+                league_issues.append({'status': status, 'players': status_groups[status], 'count': len(status_groups[status])})
+                total_issues += len(status_groups[status])
+
+    return league_issues, total_issues
+
+def get_starters_with_status(user_id, force_refresh=False, show_best_ball=False, working_set=None):
+    if working_set is None:
+        working_set = get_user_working_set(user_id, force_refresh=force_refresh)
+
+    all_players = working_set['players']
     leagues_data = {}
     
-    for league in leagues:
+    for league in working_set['leagues']:
         league_id = league['league_id']
-        with ThreadPoolExecutor() as executor:
-            settings_future = executor.submit(get_league_settings, league_id)
-            rosters_future = executor.submit(get_cached_rosters, league_id)
-            league_settings, rosters = settings_future.result(), rosters_future.result()
+        league_settings, rosters = working_set['settings'].get(league_id), working_set['rosters'].get(league_id)
         
         if not league_settings or not rosters: continue
         if not league.get('status') == 'in_season': continue
         if not show_best_ball and not league.get('settings', {}).get('best_ball') == 0: continue
 
-        roster_positions = league_settings.get('roster_positions', [])
-        league_issues, total_issues = [], 0
         user_rosters = [r for r in rosters if r.get('owner_id') == user_id]
-        
-        for roster in user_rosters:
-            starters = roster.get('starters', []) or []
-            empty_positions = _process_empty_positions(starters, roster_positions)
-            if empty_positions:
-                league_issues.append({'status': 'Empty Position', 'positions': empty_positions, 'count': len(empty_positions), 'is_empty': True})
-                total_issues += len(empty_positions)
-            
-            status_groups = defaultdict(list)
-            for player_id in starters:
-                player, status = _process_player_status(player_id, all_players)
-                if status:
-                    # Agora o 'status' já vem formatado corretamente, não precisamos mais do 'if' aqui
-                    status_groups[status].append({
-                        'id': player_id, 'name': player.get('full_name'), 'position': player.get('position'),
-                        'team': player.get('team'), 'status': status
-                    })
-            
-            for status in current_app.config['STATUS_CONFIG']:
-                if status in status_groups:
-                    league_issues.append({'status': status, 'players': status_groups[status], 'count': len(status_groups[status])})
-                    total_issues += len(status_groups[status])
+        league_issues, total_issues = _process_league_issues(league_settings, user_rosters, all_players)
         
         if league_issues:
             leagues_data[league_id] = {'name': league['name'], 'issues': league_issues, 'total_issues': total_issues}
     
     return leagues_data
 
-def get_roster_position(player_id, roster, league_id):
+def get_top_players(user_id, working_set=None):
+    """Jogadores que mais se repetem nos rosters do usuário (limitado a TOPN)."""
+    if working_set is None:
+        working_set = get_user_working_set(user_id)
+
+    all_players_data = working_set['players'] or {}
+    player_map = {}
+
+    for league in working_set['leagues']:
+        league_id = league['league_id']
+        rosters = working_set['rosters'].get(league_id) or []
+        user_rosters = [r for r in rosters if r and r.get('owner_id') == user_id]
+
+        for roster in user_rosters:
+            for player_id in roster.get('players') or []:
+                if not player_id: continue
+                player_data = all_players_data.get(player_id, {})
+                
+                if player_id not in player_map:
+                    player_map[player_id] = {
+                        'name': player_data.get('full_name') or f'Player_{player_id[:6]}',
+                        'count': 0, 'leagues': [],
+                        'position': player_data.get('position', '?'),
+                        'injury_status': utils.format_status(player_data.get('injury_status') or 'Active')
+                    }
+                
+                player_map[player_id]['count'] += 1
+                roster_position = get_roster_position(player_id, roster, league_id, working_set['settings'].get(league_id))
+                player_map[player_id]['leagues'].append({
+                    'league_name': league.get('name', 'Unknown'), 'league_id': league_id,
+                    'roster_id': roster.get('roster_id'), 'roster_position': roster_position
+                })
+    
+    players_list = sorted(list(player_map.values()), key=lambda x: (-x['count'], x['name']))
+    return players_list[:current_app.config['TOPN']]
+
+def get_players_availability(user_id, player_ids, working_set=None):
+    """
+    Matriz jogadores x ligas: 'MINE' (no roster do usuário), 'TRADE' (noutro roster) ou 'F.A'.
+    """
+    if working_set is not None:
+        all_players = working_set['players'] or {}
+        leagues = working_set['leagues']
+        indexes = [get_rostered_index(league['league_id'], working_set['rosters'].get(league['league_id'])) for league in leagues]
+    else:
+        # A matriz só precisa dos rosters: as configurações das ligas não são buscadas
+        all_players = get_all_players() or {}
+        leagues = get_user_leagues(user_id)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            indexes = list(executor.map(get_rostered_index, [league['league_id'] for league in leagues]))
+
+    players = {}
+    for player_id in player_ids:
+        player_data = all_players.get(player_id, {})
+        availability = {}
+        for league, index in zip(leagues, indexes):
+            roster = index.get(player_id)
+            if roster is None:
+                availability[league['league_id']] = 'F.A'
+            else:
+                availability[league['league_id']] = 'MINE' if roster.get('owner_id') == user_id else 'TRADE'
+        players[player_id] = {
+            'name': player_data.get('full_name') or f'Player_{player_id[:6]}',
+            'position': player_data.get('position', '?'),
+            'availability': availability
+        }
+
+    return {
+        'leagues': [{'league_id': league['league_id'], 'league_name': league.get('name', 'Unknown')} for league in leagues],
+        'players': players
+    }
+
+def iter_dashboard_sections(user_id, show_best_ball=False, force_refresh=False):
+    """
+    Gera as secções do dashboard (nome, dados) à medida que ficam prontas,
+    todas calculadas a partir do mesmo working set. As ligas saem antes da
+    busca dos rosters e das configurações.
+    """
+    leagues = get_user_leagues(user_id, force_refresh=force_refresh)
+    yield 'leagues', leagues
+    working_set = get_user_working_set(user_id, leagues=leagues)
+    yield 'player_status', get_starters_with_status(user_id, show_best_ball=show_best_ball, working_set=working_set)
+    yield 'top_players', get_top_players(user_id, working_set=working_set)
+
+def get_roster_position(player_id, roster, league_id, settings=None):
     reserve, starters, taxi = roster.get('reserve') or [], roster.get('starters') or [], roster.get('taxi') or []
     if player_id in reserve: return "IR"
     if player_id in taxi: return "TS"
     if player_id in starters:
         try:
             idx = starters.index(player_id)
-            settings = get_league_settings(league_id)
+            if settings is None:
+                settings = get_league_settings(league_id)
             if settings:
                 roster_positions = settings.get('roster_positions', [])
                 return roster_positions[idx] if idx < len(roster_positions) else "ST"
@@ -190,8 +626,7 @@ def get_roster_position(player_id, roster, league_id):
         except (ValueError, IndexError): return "ST"
     return "BN"
 
-def get_nfl_teams():
-    all_players = get_all_players()
+def build_nfl_teams(all_players):
     if not all_players:
         return []
     
@@ -209,6 +644,9 @@ def get_nfl_teams():
     teams_list.sort(key=lambda x: x['name'])
     return teams_list
 
+def get_nfl_teams():
+    return _get_derived('nfl_teams', background.build_nfl_teams)
+
 def get_nfl_depth_chart(team_abbr, league_id=None):
     all_players = get_all_players()
     if not all_players:
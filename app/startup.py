@@ -0,0 +1,35 @@
+import gc
+import logging
+import time
+
+
+def warm_up(app):
+    """
+    Carrega o snapshot de jogadores e os índices derivados antes de os workers serem criados.
+    Com preload no gunicorn corre no master, e os workers herdam tudo via fork (copy-on-write).
+    """
+    from . import background, services
+
+    start = time.perf_counter()
+    # No master não se cria o pool de processos: os workers criam o seu depois do fork
+    with app.app_context(), background.inline():
+        try:
+            players = services.get_all_players()
+            services.get_player_search_index()
+            services.get_player_index()
+            services.get_nfl_teams()
+            logging.info(f"Warm-up: {len(players)} players loaded in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            # Sem dados no arranque os workers continuam a carregar sob demanda
+            logging.error(f"Warm-up failed: {str(e)}", exc_info=True)
+
+    freeze_heap()
+
+
+def freeze_heap():
+    """
+    Move os objetos já criados para a geração permanente do GC, para que as coletas
+    nos workers não toquem (e copiem) as páginas partilhadas com o master.
+    """
+    gc.collect()
+    gc.freeze()
@@ -1,13 +1,44 @@
-export async function fetchPlayerStatus(forceRefresh = false, showBestBall = false) {
-    const endpoint = forceRefresh ? '/api/refresh-league-status' : '/api/player-status';
-    const url = `${endpoint}?showBestBall=${showBestBall}`;
-    const response = await fetch(url);
+// Endpoints com controlo de admissão respondem 429/503 com Retry-After quando estão ocupados: espera e tenta de novo
+async function fetchWithRetry(url, retries = 2) {
+    for (let attempt = 0; ; attempt++) {
+        const response = await fetch(url);
+        if (![429, 503].includes(response.status) || attempt >= retries) return response;
+        const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+    }
+}
+
+// Busca ligas, status e top players num único pedido; cada secção é entregue a onSection assim que chega
+export async function fetchDashboard(forceRefresh = false, showBestBall = false, onSection = () => {}) {
+    const params = new URLSearchParams({ showBestBall, refresh: forceRefresh, stream: true });
+    const response = await fetchWithRetry(`/api/dashboard?${params}`);
     if (!response.ok) throw new Error(`Server error: ${response.status}`);
-    return await response.json();
+
+    const bundle = {};
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const { section, data } = JSON.parse(line);
+        bundle[section] = data;
+        onSection(section, data);
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+    return bundle;
 }
 
 export async function fetchTopPlayers() {
-    const response = await fetch('/api/top-players');
+    const response = await fetchWithRetry('/api/top-players');
     if (!response.ok) throw new Error('Failed to load top players');
     return await response.json();
 }
@@ -20,9 +51,18 @@ export async function searchPlayers(query, positions) {
     return await response.json();
 }
 
+export async function fetchPlayerIndex() {
+    const meta = await fetch('/api/player-index');
+    if (!meta.ok) throw new Error('Failed to load player index version');
+    const { url } = await meta.json();
+    const response = await fetch(url);
+    if (!response.ok) throw new Error('Failed to load player index');
+    return await response.json();
+}
+
 export async function fetchPlayerDetails(playerName) {
     const params = new URLSearchParams({ name: playerName });
-    const response = await fetch(`/api/player-details?${params}`);
+    const response = await fetchWithRetry(`/api/player-details?${params}`);
     if (!response.ok) {
         throw new Error(`Error: ${response.status}`);
     }
@@ -0,0 +1,70 @@
+import { fetchPlayerIndex } from './api.js';
+
+// Índice de jogadores carregado uma vez (a URL versionada fica em cache no browser)
+let indexPromise = null;
+
+// Mesma normalização do servidor: sem acentos, apóstrofos/pontos juntam, o resto separa palavras
+function foldName(text) {
+    return (text || '').normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+}
+
+export function normalizeName(text) {
+    return foldName(text)
+        .replace(/[.'’`´]/g, '')
+        .replace(/[^a-z0-9]+/g, ' ')
+        .trim();
+}
+
+// Tokens do nome com a pontuação colada e separada ("jamarr"/"ja marr", "amonra"/"amon ra", "dk"/"d k")
+function nameTokens(text) {
+    const folded = foldName(text);
+    const joined = folded.replace(/[.'’`´-]/g, '').split(/[^a-z0-9]+/);
+    const split = folded.split(/[^a-z0-9]+/);
+    return [...new Set([...joined, ...split])].filter(Boolean);
+}
+
+async function buildIndex() {
+    const data = await fetchPlayerIndex();
+    const fields = Object.fromEntries(data.fields.map((field, i) => [field, i]));
+    return data.players.map(row => {
+        const name = row[fields.name];
+        return {
+            id: row[fields.id],
+            name,
+            positions: row[fields.positions],
+            status: data.statuses[row[fields.status]],
+            depth_chart_order: row[fields.depth_chart_order],
+            tokens: nameTokens(name)
+        };
+    });
+}
+
+export function loadPlayerIndex() {
+    if (!indexPromise) {
+        indexPromise = buildIndex().catch(error => {
+            console.error('Player index unavailable:', error);
+            indexPromise = null;
+            return null;
+        });
+    }
+    return indexPromise;
+}
+
+// Busca local por prefixo de palavras; retorna null se o índice não estiver disponível
+export async function searchPlayersLocally(query, positions, limit = 20) {
+    const index = await loadPlayerIndex();
+    if (!index) return null;
+
+    const queryTokens = normalizeName(query).split(' ').filter(Boolean);
+    if (queryTokens.length === 0) return [];
+
+    const results = index.filter(player =>
+        player.positions.some(pos => positions.includes(pos)) &&
+        queryTokens.every(q => player.tokens.some(token => token.startsWith(q)))
+    );
+
+    results.sort((a, b) =>
+        (a.depth_chart_order ?? Infinity) - (b.depth_chart_order ?? Infinity) || a.name.localeCompare(b.name)
+    );
+    return results.slice(0, limit);
+}
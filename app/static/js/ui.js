@@ -1,15 +1,15 @@
 import { createPlayerCardComponent, createLeagueElement } from './components.js';
-import { fetchPlayerStatus, fetchTopPlayers, fetchPlayerDetails, searchPlayers, fetchNflTeams, fetchDepthChart, fetchAllLeagues } from './api.js';
+import { loadPlayerIndex, searchPlayersLocally } from './search.js';
+import { fetchDashboard, fetchTopPlayers, fetchPlayerDetails, searchPlayers, fetchNflTeams, fetchDepthChart, fetchAllLeagues } from './api.js';
 
 // Estado da UI
-const appState = { expandedState: {} };
+const appState = { expandedState: {}, bundle: {} };
 const POSITIONS = ['QB', 'RB', 'WR', 'TE', 'K', 'DEF', 'DL', 'LB', 'DB'];
 const STATUS_ORDER = { 'PUP': 0, 'IR': 1, 'Suspended': 2, 'OUT': 3, 'Doubtful': 4, 'Questionable': 5, 'Probable': 6 };
 
 // --- Aba "Status Player" ---
 export async function loadPlayerStatus(forceRefresh = false, showBestBall = false) {
     const container = document.getElementById('leagues-container');
-    const noIssues = document.getElementById('no-issues-message');
     const reloadBtn = document.getElementById('reload-btn');
     
     // Seleciona os botões das outras abas
@@ -25,15 +25,9 @@ export async function loadPlayerStatus(forceRefresh = false, showBestBall = fals
     container.innerHTML = '<div class="loading">Loading player status...</div>';
     
     try {
-        const leagues = await fetchPlayerStatus(forceRefresh, showBestBall);
-        noIssues.style.display = Object.keys(leagues).length === 0 ? 'block' : 'none';
-        container.innerHTML = '';
-        
-        Object.entries(leagues).forEach(([leagueId, league]) => {
-            league.issues.sort((a, b) => (STATUS_ORDER[a.status] ?? 99) - (STATUS_ORDER[b.status] ?? 99));
-            const leagueEl = createLeagueElement(leagueId, league, appState.expandedState);
-            container.appendChild(leagueEl);
-            addLeagueEventListeners(leagueEl);
+        // O bundle traz também as ligas e os top players, guardados para as outras abas
+        appState.bundle = await fetchDashboard(forceRefresh, showBestBall, (section, data) => {
+            if (section === 'player_status') renderPlayerStatus(data);
         });
     } catch (error) {
         container.innerHTML = `<div class="error"><p>Error loading player status:</p><p><strong>${error.message}</strong></p></div>`;
@@ -48,6 +42,27 @@ export async function loadPlayerStatus(forceRefresh = false, showBestBall = fals
     }
 }
 
+function renderPlayerStatus(leagues) {
+    const container = document.getElementById('leagues-container');
+    const noIssues = document.getElementById('no-issues-message');
+    noIssues.style.display = Object.keys(leagues).length === 0 ? 'block' : 'none';
+    container.innerHTML = '';
+    
+    Object.entries(leagues).forEach(([leagueId, league]) => {
+        league.issues.sort((a, b) => (STATUS_ORDER[a.status] ?? 99) - (STATUS_ORDER[b.status] ?? 99));
+        const leagueEl = createLeagueElement(leagueId, league, appState.expandedState);
+        container.appendChild(leagueEl);
+        addLeagueEventListeners(leagueEl);
+    });
+}
+
+// Usa a secção do bundle uma única vez; depois disso volta a pedir ao servidor
+function takeBundleSection(section) {
+    const data = appState.bundle[section];
+    delete appState.bundle[section];
+    return data;
+}
+
 function addLeagueEventListeners(leagueEl) {
     const leagueId = leagueEl.dataset.leagueId;
     leagueEl.querySelector('.league-header').addEventListener('click', () => toggleLeague(leagueId, leagueEl));
@@ -85,6 +100,7 @@ function toggleStatusGroup(leagueId, groupHeader) {
 
 // --- Aba "Find Player" ---
 export function initFindForPlayerTab() {
+    loadPlayerIndex();
     loadTopPlayers();
     initPositionFilters();
 }
@@ -93,7 +109,7 @@ async function loadTopPlayers() {
     const container = document.getElementById('top-players-container');
     container.innerHTML = '<div class="loading">Loading your top players...</div>';
     try {
-        const players = await fetchTopPlayers();
+        const players = takeBundleSection('top_players') || await fetchTopPlayers();
         container.innerHTML = '';
         if (players.length === 0) {
             container.innerHTML = '<div class="no-players">No players found</div>';
@@ -133,7 +149,12 @@ export const updateSearchSuggestions = debounce(async () => {
 
     try {
         const positions = Array.from(document.querySelectorAll('.position-filter input:checked')).map(cb => cb.value);
-        const players = await searchPlayers(query, positions);
+        // Busca no índice local; o servidor só é chamado se o índice faltar ou não houver resultados
+        // (a busca do servidor tolera erros de digitação)
+        let players = await searchPlayersLocally(query, positions);
+        if (!players || players.length === 0) {
+            players = await searchPlayers(query, positions);
+        }
         
         suggestionsEl.innerHTML = '';
         if (players.length === 0) {
@@ -241,7 +262,7 @@ async function populateLeagueContextSelect() {
     try {
         // ANTES: usava fetchPlayerStatus() que retorna dados filtrados
         // AGORA: usa a nova função fetchAllLeagues() para buscar TODAS as ligas
-        const leagues = await fetchAllLeagues();
+        const leagues = takeBundleSection('leagues') || await fetchAllLeagues();
         
         // A nova API retorna um array simples de ligas, então o loop é mais direto
         leagues.forEach(league => {
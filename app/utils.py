@@ -1,14 +1,73 @@
 import os
 import json
+import codecs
+import tempfile
 import time as time_module
-from datetime import datetime, timedelta, time
+from datetime import datetime
 from functools import wraps
 from flask import session, redirect, url_for, request, jsonify, current_app
-from cachetools import TTLCache
+from cachetools import LRUCache
+from . import freshness, jsonlib
+from .cache import BudgetedCache, LockedCache
+from .config import Config
 
-# Caches com TTLCache (in-memory)
-PLAYERS_CACHE_IN_MEMORY = TTLCache(maxsize=1, ttl=600)
-LEAGUE_CACHE = TTLCache(maxsize=100, ttl=300)
+# Política de validade dos caches (reconfigurada em create_app)
+FRESHNESS_POLICY = freshness.create_policy(vars(Config))
+
+def init_freshness_policy(config):
+    global FRESHNESS_POLICY
+    FRESHNESS_POLICY = freshness.create_policy(config)
+
+def init_cache_budgets(config):
+    """Aplica os orçamentos de memória da app aos caches com contabilização de bytes."""
+    budgets = config['CACHE_BUDGETS']
+    LEAGUE_CACHE.configure({ns: budgets[ns] for ns in ('leagues', 'rosters', 'settings', 'state')})
+    STALE_RESPONSE_CACHE.configure({'stale': budgets['stale']})
+    ROSTER_SYNC_STATE.configure({'roster_sync': budgets['roster_sync']})
+    ROSTERED_INDEX.configure({'rostered_index': budgets['rostered_index']})
+
+def get_cache_stats():
+    """Tamanho, taxa de acerto e expulsões por namespace dos caches in-memory."""
+    stats = {}
+    for cache in (LEAGUE_CACHE, ROSTER_SYNC_STATE, ROSTERED_INDEX, STALE_RESPONSE_CACHE):
+        stats.update(cache.stats())
+    return stats
+
+def _league_cache_data_type(key):
+    if isinstance(key, tuple):
+        return 'leagues'
+    if key == 'nfl_state':
+        return 'state'
+    if isinstance(key, str) and key.startswith('settings_'):
+        return 'settings'
+    return 'rosters'
+
+def _league_cache_ttu(key, value, now):
+    # Falha ao obter o estado da NFL fica em cache pouco tempo, para não bloquear a política nem a sincronização
+    if key == 'nfl_state' and not value:
+        return now + Config.NFL_STATE_FAILURE_TTL
+    return now + FRESHNESS_POLICY.ttl(_league_cache_data_type(key))
+
+# Caches in-memory (o LEAGUE_CACHE tem TTL por tipo de dado, segundo a política)
+# Os caches são partilhados pelas threads do worker (gthread), por isso todos têm lock
+# Snapshot de jogadores (mtime, dados); fica em memória mesmo expirado para servir durante a atualização
+PLAYERS_CACHE_IN_MEMORY = LockedCache(LRUCache(maxsize=1))
+# Os caches com dados das ligas são limitados por bytes, com um orçamento por namespace (ver CACHE_BUDGETS)
+LEAGUE_CACHE = BudgetedCache(
+    {ns: Config.CACHE_BUDGETS[ns] for ns in ('leagues', 'rosters', 'settings', 'state')},
+    namespace_of=_league_cache_data_type, ttu=_league_cache_ttu
+)
+# Última resposta válida por URL, servida quando o Sleeper está em falha
+STALE_RESPONSE_CACHE = BudgetedCache({'stale': Config.CACHE_BUDGETS['stale']}, namespace_of=lambda key: 'stale')
+# Estado local dos rosters por liga para a sincronização incremental via transações
+ROSTER_SYNC_STATE = BudgetedCache({'roster_sync': Config.CACHE_BUDGETS['roster_sync']}, namespace_of=lambda key: 'roster_sync')
+# Índice player_id -> roster por liga, reconstruído só quando a lista de rosters muda. O tamanho
+# inclui os rosters que o índice mantém vivos, e expira com o TTL de rosters para não os segurar
+ROSTERED_INDEX = BudgetedCache(
+    {'rostered_index': Config.CACHE_BUDGETS['rostered_index']},
+    namespace_of=lambda key: 'rostered_index',
+    ttu=lambda key, value, now: now + FRESHNESS_POLICY.ttl('rosters')
+)
 
 # --- DECORATORS ---
 def login_required(f):
@@ -33,25 +92,12 @@ def admin_login_required(f):
     return decorated_function
 
 # --- FUNÇÕES DE TEMPO E TTL ---
-def is_night_time():
-    now = datetime.now().time()
-    return now >= time(23, 0) or now < time(6, 0)
-
-def is_morning_time():
-    now = datetime.now().time()
-    return time(6, 0) <= now < time(10, 0)
-
-def get_cache_ttl():
-    if is_night_time():
-        now = datetime.now()
-        next_6am = (now + timedelta(days=1)).replace(hour=6, minute=0, second=0, microsecond=0)
-        if now.hour >= 23:
-            next_6am = now.replace(hour=6, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        return (next_6am - now).total_seconds()
-    elif is_morning_time():
-        return 3600  # 1 hora
-    else:
-        return 600   # 10 minutos
+def get_cache_ttl(data_type='players', at=None):
+    """TTL em segundos para um tipo de dado obtido no instante `at` (por omissão, agora)."""
+    return FRESHNESS_POLICY.ttl(data_type, at)
+
+def get_freshness_phase():
+    return FRESHNESS_POLICY.phase()
 
 # --- GERENCIAMENTO DE CACHE EM DISCO ---
 def load_players_from_disk():
@@ -62,41 +108,130 @@ def load_players_from_disk():
         
         mod_time = os.path.getmtime(players_cache_file)
         current_time = time_module.time()
-        
-        mod_datetime = datetime.fromtimestamp(mod_time)
-        mod_was_night = mod_datetime.hour >= 23 or mod_datetime.hour < 6
-        
-        if mod_was_night and is_night_time():
-            with open(players_cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f), mod_time
-                
-        ttl = get_cache_ttl()
-        if current_time - mod_time < ttl:
-            with open(players_cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f), mod_time
+
+        # A validade conta a partir do momento em que o cache foi gravado
+        if current_time - mod_time < get_cache_ttl('players', at=mod_time):
+            # Reutiliza o snapshot em memória enquanto o ficheiro não mudar
+            in_memory = PLAYERS_CACHE_IN_MEMORY.get('players')
+            if in_memory and in_memory[0] == mod_time:
+                return in_memory[1], mod_time
+            players = jsonlib.load_file(players_cache_file)
+            PLAYERS_CACHE_IN_MEMORY['players'] = (mod_time, players)
+            return players, mod_time
                 
         return None, mod_time
     except Exception as e:
         current_app.logger.error(f"Erro ao ler cache de jogadores: {str(e)}")
         return None, 0
 
-def save_players_to_disk(players_data):
-    players_cache_file = current_app.config['PLAYERS_CACHE_FILE']
+def get_players_snapshot_version():
+    """Versão (mtime do ficheiro) do snapshot de jogadores em memória, ou None."""
+    in_memory = PLAYERS_CACHE_IN_MEMORY.get('players')
+    return in_memory[0] if in_memory else None
+
+def save_players_stream(items, players_cache_file=None):
+    """
+    Grava pares (player_id, dados) no cache de jogadores à medida que chegam.
+    Escreve num ficheiro temporário e só substitui o cache no fim (escrita atómica).
+    Retorna o dicionário de jogadores gravado.
+    """
+    if players_cache_file is None:
+        players_cache_file = current_app.config['PLAYERS_CACHE_FILE']
+    cache_dir = os.path.dirname(players_cache_file) or '.'
+    players = {}
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
     try:
-        with open(players_cache_file, 'w', encoding='utf-8') as f:
-            json.dump(players_data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        current_app.logger.error(f"Erro ao salvar cache de jogadores: {str(e)}")
-        return False
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'{')
+            for pid, pdata in items:
+                if players:
+                    f.write(b',')
+                f.write(jsonlib.dumpb(pid))
+                f.write(b':')
+                f.write(jsonlib.dumpb(pdata))
+                players[pid] = pdata
+            f.write(b'}')
+        if not players:
+            os.remove(tmp_path)
+            return players
+        os.replace(tmp_path, players_cache_file)
+        return players
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# --- LEITURA DE JSON EM STREAMING ---
+def iter_json_object_items(chunks):
+    """
+    Itera os pares (chave, valor) de um objeto JSON de topo recebido em blocos de bytes,
+    sem carregar o documento inteiro em memória.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    state = {'buf': '', 'pos': 0, 'eof': False}
+
+    def fill():
+        chunk = next(chunks, None)
+        if chunk is None:
+            state['eof'] = True
+            tail = text_decoder.decode(b'', final=True)
+        else:
+            tail = text_decoder.decode(chunk)
+        state['buf'] = state['buf'][state['pos']:] + tail
+        state['pos'] = 0
+        return chunk is not None
+
+    def peek():
+        while True:
+            buf, pos = state['buf'], state['pos']
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError('Unexpected end of JSON stream')
+
+    def expect(char):
+        if peek() != char:
+            raise ValueError(f"Expected '{char}' at JSON stream position {state['pos']}")
+        state['pos'] += 1
+
+    def decode_value():
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(state['buf'], state['pos'])
+                # Um número no fim do buffer pode estar truncado
+                if end < len(state['buf']) or state['eof']:
+                    state['pos'] = end
+                    return value
+            except json.JSONDecodeError:
+                if state['eof']:
+                    raise
+            fill()
+
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = decode_value()
+        expect(':')
+        yield key, decode_value()
+        if peek() == ',':
+            state['pos'] += 1
+            continue
+        expect('}')
+        return
 
 # --- LOGGING DE ACESSO ---
 def log_user_access(username):
     access_log_file = current_app.config['ACCESS_LOG_FILE']
     try:
         if os.path.exists(access_log_file):
-            with open(access_log_file, 'r', encoding='utf-8') as f:
-                access_data = json.load(f)
+            access_data = jsonlib.load_file(access_log_file)
         else:
             access_data = []
         
@@ -106,8 +241,7 @@ def log_user_access(username):
             'ip': request.remote_addr
         })
         
-        with open(access_log_file, 'w', encoding='utf-8') as f:
-            json.dump(access_data, f, indent=2, ensure_ascii=False)
+        jsonlib.dump_file(access_data, access_log_file)
     except Exception as e:
         current_app.logger.error(f"Erro ao registrar acesso: {str(e)}")
 
@@ -0,0 +1,71 @@
+"""
+Benchmark de parse e serialização do snapshot de jogadores: json da stdlib vs orjson.
+
+Uso: python benchmarks/bench_json.py [caminho/players_cache.json]
+Sem ficheiro, gera um snapshot sintético com o tamanho aproximado do feed de jogadores ativos.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app import jsonlib  # noqa: E402
+
+
+def synthetic_players(count=4000):
+    random.seed(42)
+    positions = ['QB', 'RB', 'WR', 'TE', 'K', 'DEF', 'DL', 'LB', 'DB']
+    players = {}
+    for i in range(count):
+        position = random.choice(positions)
+        players[str(1000 + i)] = {
+            'player_id': str(1000 + i), 'full_name': f'Jogador Número {i}', 'first_name': 'Jogador',
+            'last_name': f'Número {i}', 'position': position, 'fantasy_positions': [position],
+            'team': random.choice(['KC', 'BUF', 'DET', 'SF', None]), 'status': 'Active',
+            'injury_status': random.choice([None, 'Questionable', 'Out']), 'active': True,
+            'depth_chart_position': position, 'depth_chart_order': random.choice([None, 1, 2, 3]),
+            'search_rank': random.randint(1, 9999999)
+        }
+    return players
+
+
+def bench(label, func, repeat=10):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f'{label:<32} {best * 1000:8.2f} ms')
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as f:
+            raw = f.read()
+        players = json.loads(raw)
+    else:
+        players = synthetic_players()
+        raw = json.dumps(players).encode('utf-8')
+
+    print(f'{len(players)} jogadores, {len(raw) / 1024:.0f} KiB, backend: {jsonlib.BACKEND}')
+    bench('stdlib json.loads', lambda: json.loads(raw))
+    bench('jsonlib.loads', lambda: jsonlib.loads(raw))
+    bench('stdlib json.dumps (indent=2)', lambda: json.dumps(players, ensure_ascii=False, indent=2))
+    bench('stdlib json.dumps (compacto)', lambda: json.dumps(players, ensure_ascii=False, separators=(',', ':')))
+    bench('jsonlib.dumpb', lambda: jsonlib.dumpb(players))
+
+    # Caminho do jsonify: o provider recebe os argumentos que o Flask usa em produção
+    app = Flask(__name__)
+    default_provider, fast_provider = DefaultJSONProvider(app), jsonlib.FastJSONProvider(app)
+    with app.app_context():
+        bench('Flask padrão response()', lambda: default_provider.response(players).get_data())
+        bench('FastJSONProvider response()', lambda: fast_provider.response(players).get_data())
+
+
+if __name__ == '__main__':
+    main()
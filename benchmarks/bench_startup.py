@@ -0,0 +1,72 @@
+"""
+Benchmark de arranque: tempo do create_app, do warm-up (snapshot + índices) e
+latência da primeira busca num worker frio vs. num worker que herdou o warm-up.
+
+Uso: python benchmarks/bench_startup.py [caminho/players_cache.json]
+Sem ficheiro, usa um snapshot sintético. O estado da NFL é preenchido localmente
+para o benchmark não depender da rede.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_json import synthetic_players  # noqa: E402
+from app import background, create_app, jsonlib, utils  # noqa: E402
+from app.startup import warm_up  # noqa: E402
+
+NFL_STATE = {'season': '2025', 'season_type': 'regular', 'week': 7}
+
+
+def make_app(cache_dir, source):
+    app = create_app('default')
+    app.config['CACHE_DIR'] = cache_dir
+    app.config['PLAYERS_CACHE_FILE'] = os.path.join(cache_dir, 'players_cache.json')
+    if source:
+        shutil.copy(source, app.config['PLAYERS_CACHE_FILE'])
+    else:
+        jsonlib.dump_file(synthetic_players(), app.config['PLAYERS_CACHE_FILE'])
+    return app
+
+
+def reset_caches():
+    utils.PLAYERS_CACHE_IN_MEMORY.clear()
+    utils.LEAGUE_CACHE.clear()
+    background.clear_published()
+    utils.LEAGUE_CACHE['nfl_state'] = NFL_STATE
+
+
+def first_search_ms(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'bench'
+    start = time.perf_counter()
+    client.get('/api/search-players?query=jogador%2012&positions=QB&positions=WR')
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    cache_dir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        app = make_app(cache_dir, source)
+        print(f"{'create_app':<36} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+        reset_caches()
+        print(f"{'primeira busca (worker frio)':<36} {first_search_ms(app):8.2f} ms")
+
+        reset_caches()
+        start = time.perf_counter()
+        warm_up(app)
+        print(f"{'warm-up no master':<36} {(time.perf_counter() - start) * 1000:8.2f} ms")
+        print(f"{'primeira busca (após warm-up)':<36} {first_search_ms(app):8.2f} ms")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
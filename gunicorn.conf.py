@@ -0,0 +1,18 @@
+import os
+
+# App carregada no master antes do fork: os workers partilham o snapshot de jogadores
+preload_app = True
+
+# App limitada por I/O (pedidos ao Sleeper): poucos processos, várias threads por processo
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    # Corre no master depois do preload e antes de criar os workers
+    from app.startup import warm_up
+    warm_up(server.app.wsgi())
@@ -1,8 +1,10 @@
 import os
 from app import create_app
 
-# Cria a aplicação usando a fábrica a partir da configuração do ambiente
-app = create_app(os.getenv('FLASK_CONFIG') or 'default')
+# Cria a aplicação usando a fábrica a partir da configuração do ambiente.
+# Os processos de manutenção (spawn) reimportam este módulo como __mp_main__ e não precisam dela.
+if __name__ != '__mp_main__':
+    app = create_app(os.getenv('FLASK_CONFIG') or 'default')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
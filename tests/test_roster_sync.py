@@ -0,0 +1,87 @@
+import json
+
+import pytest
+import requests
+
+from app import freshness, services, utils
+
+LEAGUE_ID = '123'
+ROSTERS = [
+    {'roster_id': 1, 'owner_id': 'a', 'players': ['p1', 'p2'], 'starters': ['p1']},
+    {'roster_id': 2, 'owner_id': 'b', 'players': ['p3'], 'starters': ['p3']}
+]
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.content = json.dumps(data).encode()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def sleeper(monkeypatch):
+    """Cliente Sleeper falso com relógio controlado; retorna a lista de URLs pedidas."""
+    clock = {'now': 1_000_000.0}
+    calls = []
+
+    def fake_get(url, timeout=10, stream=False):
+        calls.append(url)
+        if url.endswith('/state/nfl'):
+            return FakeResponse({'season': '2025', 'season_type': 'regular', 'week': 5})
+        if url.endswith('/rosters'):
+            return FakeResponse(ROSTERS)
+        return FakeResponse([])
+
+    monkeypatch.setattr(requests, 'get', fake_get)
+    monkeypatch.setattr(services.time, 'time', lambda: clock['now'])
+    monkeypatch.setattr(utils.LEAGUE_CACHE, '_timer', lambda: clock['now'])
+    monkeypatch.setattr(utils, 'FRESHNESS_POLICY', freshness.FixedSchedulePolicy(default_ttl=300))
+    monkeypatch.setattr(utils, 'get_freshness_phase', lambda: 'week')
+    monkeypatch.setitem(services.ROSTER_SYNC_SETTINGS, 'mode', 'incremental')
+    for cache in (utils.LEAGUE_CACHE, utils.ROSTER_SYNC_STATE, utils.STALE_RESPONSE_CACHE):
+        cache.clear()
+    yield clock, calls
+    for cache in (utils.LEAGUE_CACHE, utils.ROSTER_SYNC_STATE, utils.STALE_RESPONSE_CACHE):
+        cache.clear()
+
+
+def _roster_calls(calls):
+    return [url.split(f'/league/{LEAGUE_ID}/')[1] for url in calls if f'/league/{LEAGUE_ID}/' in url]
+
+
+def test_expired_rosters_are_synced_from_transactions(sleeper):
+    clock, calls = sleeper
+    assert services.get_cached_rosters(LEAGUE_ID) == ROSTERS
+
+    for _ in range(2):
+        clock['now'] += 301  # TTL de rosters expira
+        services.get_cached_rosters(LEAGUE_ID)
+
+    assert _roster_calls(calls) == ['rosters', 'transactions/5', 'transactions/5']
+
+
+def test_full_refetch_after_full_sync_interval(sleeper):
+    clock, calls = sleeper
+    services.get_cached_rosters(LEAGUE_ID)
+
+    clock['now'] += services.ROSTER_SYNC_SETTINGS['full_sync_interval']
+    services.get_cached_rosters(LEAGUE_ID)
+
+    assert _roster_calls(calls) == ['rosters', 'rosters']
+
+
+def test_lineup_interval_applies_during_game_windows(sleeper, monkeypatch):
+    clock, calls = sleeper
+    monkeypatch.setattr(utils, 'get_freshness_phase', lambda: 'inactives')
+    services.get_cached_rosters(LEAGUE_ID)
+
+    clock['now'] += services.ROSTER_SYNC_SETTINGS['lineup_sync_interval']
+    services.get_cached_rosters(LEAGUE_ID)
+
+    assert _roster_calls(calls) == ['rosters', 'rosters']